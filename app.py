@@ -4,13 +4,46 @@ import httpx
 from PIL import Image
 from io import BytesIO
 import time
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
 import os
 from datetime import datetime
 import pandas as pd
+import numpy as np
 import traceback
+import re
+import difflib
+import hashlib
+import gzip
+import uuid
+import zipfile
+import shutil
+import multiprocessing
+import random
+import socket
+import sys
+import argparse
+import importlib.util
+import math
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from groq import Groq
 
+import report as report_renderer
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # ===================== PAGE CONFIG =====================
 st.set_page_config(
     page_title="SocialScan",
@@ -19,29 +52,260 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# ===================== METRICS =====================
+METRICS_PORT = os.getenv("SOCIALSCAN_METRICS_PORT")      # Serve /metrics on this port when set
+METRICS_FILE = os.getenv("SOCIALSCAN_METRICS_FILE")      # Write Prometheus text here when set
+METRICS_FILE_INTERVAL = 15                               # Seconds between metrics file writes
+METRICS_SAMPLE_SIZE = 1000                               # Recent timings kept per stage for percentiles
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+class MetricsRegistry:
+    """Thread-safe counters and stage timings, exported in Prometheus text format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        """Record one timing for a stage."""
+        with self.lock:
+            timing = self.timings.get(stage)
+            if timing is None:
+                timing = self.timings[stage] = {
+                    "count": 0,
+                    "sum": 0.0,
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                    "samples": deque(maxlen=METRICS_SAMPLE_SIZE),
+                }
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["samples"].append(seconds)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    timing["buckets"][i] += 1
+
+    @contextmanager
+    def timer(self, stage):
+        """Time a block as one call of stage, counting it as an error if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("socialscan_stage_errors_total", stage=stage)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Copy of all counters and per-stage summaries for display."""
+        with self.lock:
+            counters = dict(self.counters)
+            stages = {}
+            for stage, timing in self.timings.items():
+                samples = sorted(timing["samples"])
+                stages[stage] = {
+                    "count": timing["count"],
+                    "total_s": timing["sum"],
+                    "mean_ms": 1000 * timing["sum"] / timing["count"],
+                    "p50_ms": 1000 * samples[int(0.50 * (len(samples) - 1))],
+                    "p99_ms": 1000 * samples[int(0.99 * (len(samples) - 1))],
+                }
+        return counters, stages
+
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            seen = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in seen:
+                    lines.append(f"# TYPE {name} counter")
+                    seen.add(name)
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+            if self.timings:
+                lines.append("# TYPE socialscan_stage_seconds histogram")
+            for stage, timing in sorted(self.timings.items()):
+                for bound, count in zip(LATENCY_BUCKETS, timing["buckets"]):
+                    lines.append(f'socialscan_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'socialscan_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {timing["count"]}')
+                lines.append(f'socialscan_stage_seconds_sum{{stage="{stage}"}} {timing["sum"]}')
+                lines.append(f'socialscan_stage_seconds_count{{stage="{stage}"}} {timing["count"]}')
+        return "\n".join(lines) + "\n"
+
+@st.cache_resource
+def get_metrics_registry():
+    """One registry per process, kept across Streamlit reruns."""
+    return MetricsRegistry()
+
+metrics = get_metrics_registry()
+
+def record_cache_lookup(cache, hit):
+    """Count a hit or miss for a named cache."""
+    metrics.inc("socialscan_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+def record_token_usage(purpose, prompt_tokens, completion_tokens):
+    """Count LLM tokens by purpose (analysis, chunk summaries)."""
+    metrics.inc("socialscan_llm_tokens_total", prompt_tokens or 0, purpose=purpose, kind="prompt")
+    metrics.inc("socialscan_llm_tokens_total", completion_tokens or 0, purpose=purpose, kind="completion")
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes out of the console
+
+def export_metrics_to_file(path):
+    """Write the current metrics atomically, e.g. for node_exporter's textfile collector."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(metrics.render_prometheus())
+    os.replace(tmp_path, path)
+
+@st.cache_resource
+def start_metrics_exporters():
+    """Start the /metrics endpoint and file exporter configured by environment, once per process."""
+    if METRICS_PORT:
+        server = ThreadingHTTPServer(("0.0.0.0", int(METRICS_PORT)), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    if METRICS_FILE:
+        def write_loop():
+            while True:
+                try:
+                    export_metrics_to_file(METRICS_FILE)
+                except OSError:
+                    pass
+                time.sleep(METRICS_FILE_INTERVAL)
+        threading.Thread(target=write_loop, daemon=True).start()
+    return True
+
+# Worker and report processes re-import this module; only the parent binds the port and file
+if multiprocessing.parent_process() is None:
+    start_metrics_exporters()
+
 # ===================== MONGODB CONNECTION =====================
+def bind_database(database):
+    """Point every collection the app uses at database (the benchmark harness rebinds it)."""
+    global db, collection, posts_collection, comments_collection, summary_cache, evidence_blobs, evidence_captures
+    global scrape_queue, rate_tokens, watchlist, watch_events
+    db = database
+    collection = database["users"]
+    posts_collection = database["posts"]
+    comments_collection = database["comments"]
+    summary_cache = database["chunk_summaries"]
+    evidence_blobs = database["evidence_blobs"]
+    evidence_captures = database["evidence_captures"]
+    scrape_queue = database["scrape_queue"]
+    rate_tokens = database["rate_tokens"]
+    watchlist = database["watchlist"]
+    watch_events = database["watch_events"]
+
 try:
-    MONGO_URI = "mongodb://localhost:27017/"
+    MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
     client_mongo = MongoClient(MONGO_URI)
-    db = client_mongo["instagram_user"]
-    collection = db["users"]
+    bind_database(client_mongo["instagram_user"])
 except Exception as e:
     st.error(f"Failed to connect to MongoDB: {e}")
+    db = None
     collection = None
+    posts_collection = None
+    comments_collection = None
+    summary_cache = None
+    evidence_blobs = None
+    evidence_captures = None
+    scrape_queue = None
+    rate_tokens = None
+    watchlist = None
+    watch_events = None
+
+@st.cache_resource
+def ensure_indexes(database_name):
+    """Create the indexes the app relies on, once per database and process."""
+    collection.create_index("user_info.Username")
+    posts_collection.create_index([("profile_id", 1), ("ID", 1)], unique=True)
+    posts_collection.create_index([("profile_id", 1), ("Timestamp", -1), ("ID", -1)])
+    comments_collection.create_index([("profile_id", 1), ("post_id", 1), ("position", 1)], unique=True)
+    evidence_captures.create_index([("username", 1), ("kind", 1), ("captured_at", -1)])
+    evidence_captures.create_index([("scrape_id", 1), ("kind", 1)])
+    evidence_captures.create_index("sha256")
+    scrape_queue.create_index([("state", 1), ("enqueued_at", 1)])
+    scrape_queue.create_index([("state", 1), ("lease_expires", 1)])
+    rate_tokens.create_index("available_at")
+    watchlist.create_index("next_poll_at")
+    watch_events.create_index([("username", 1), ("detected_at", -1)])
+    watch_events.create_index("detected_at")
+    return True
 
 # ===================== HTTP CLIENT SETUP =====================
-client = httpx.Client(
-    headers={
-        "x-ig-app-id": "936619743392459",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/62.0.3202.94 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Accept": "/",
-    },
-    cookies={
-        "sessionid": "REPLACE_WITH_YOUR_SESSION_ID"
-    }
-)
+INSTAGRAM_API_BASE = os.getenv("INSTAGRAM_API_BASE", "https://i.instagram.com")
+
+INSTAGRAM_HEADERS = {
+    "x-ig-app-id": "936619743392459",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/62.0.3202.94 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept": "/",
+}
+
+# Comma-separated sessionid cookies; workers rotate through them
+INSTAGRAM_SESSION_IDS = [
+    session_id.strip()
+    for session_id in os.getenv("INSTAGRAM_SESSION_IDS", "REPLACE_WITH_YOUR_SESSION_ID").split(",")
+    if session_id.strip()
+]
+
+def make_instagram_client(session_id):
+    """HTTP client carrying one Instagram session."""
+    return httpx.Client(headers=INSTAGRAM_HEADERS, cookies={"sessionid": session_id})
+
+client = make_instagram_client(INSTAGRAM_SESSION_IDS[0])
+
+# Called before every Instagram request when set; scrape workers install the shared rate limit here
+request_gate = None
+
+HTTP_RETRIES = 2                  # Extra attempts on throttling, server errors and timeouts
+HTTP_RETRY_BACKOFF = 2            # Seconds, doubled on each retry
+
+def instagram_get(url, stage, http_client=None, **kwargs):
+    """GET an Instagram URL with retries, recording timing, status, bytes and retries."""
+    http_client = http_client or client
+    for attempt in range(HTTP_RETRIES + 1):
+        if attempt:
+            metrics.inc("socialscan_http_retries_total", stage=stage)
+            time.sleep(HTTP_RETRY_BACKOFF * 2 ** (attempt - 1))
+        if request_gate is not None:
+            request_gate()
+        try:
+            with metrics.timer(stage):
+                response = http_client.get(url, **kwargs)
+        except httpx.TransportError:
+            if attempt == HTTP_RETRIES:
+                raise
+            continue
+
+        metrics.inc("socialscan_http_responses_total", stage=stage, status=response.status_code)
+        metrics.inc("socialscan_http_bytes_total", len(response.content), stage=stage)
+        if response.status_code != 429 and response.status_code < 500:
+            break
+    return response
 
 # ===================== GROQ CLIENT SETUP =====================
 def get_groq_client():
@@ -122,20 +386,31 @@ def get_saved_usernames():
     return saved_users
 
 def load_saved_user(username):
-    """Load saved user data from MongoDB."""
+    """
+    Load saved user data from MongoDB.
+
+    Only the profile header and the post count are read here. Posts are fetched a page at a
+    time through the returned loader, load_page(skip, limit), without comments;
+    display_media_grid fetches comments for the page it shows.
+
+    Returns:
+        tuple: (user_info dict, load_page callable or None, total number of posts)
+    """
     if collection is None:
         st.error("MongoDB connection not available")
-        return {"Error": "Database connection error"}, []
+        return {"Error": "Database connection error"}, None, 0
     
     try:
-        user_data = collection.find_one({"user_info.Username": username})
-        if user_data:
-            return user_data.get("user_info", {}), user_data.get("images", [])
-        else:
-            return {"Error": "User not found"}, []
+        with metrics.timer("mongo_read"):
+            user_data = collection.find_one({"user_info.Username": username})
+            if user_data:
+                def load_page(skip, limit):
+                    return load_user_posts(user_data, skip=skip, limit=limit)
+                return user_data.get("user_info", {}), load_page, count_user_posts(user_data)
+        return {"Error": "User not found"}, None, 0
     except Exception as e:
         st.error(f"Error loading user data: {e}")
-        return {"Error": str(e)}, []
+        return {"Error": str(e)}, None, 0
 
 def export_user_data_to_csv(username):
     """Export user data to CSV file."""
@@ -158,7 +433,9 @@ def export_user_data_to_csv(username):
         data = {key: [value] for key, value in user_info.items()}
         
         # Add image data
-        images = user_data.get("images", [])
+        images = load_user_posts(
+            user_data, fields=["Likes", "Caption", "Timestamp", "Source"], limit=REPORT_MAX_POSTS
+        )
         for i, image in enumerate(images):
             for key, value in image.items():
                 data[f"image_{i}_{key}"] = [value]
@@ -171,13 +448,285 @@ def export_user_data_to_csv(username):
     except Exception as e:
         return False, f"Error exporting data: {e}"
 
+# ===================== EVIDENCE ARCHIVE =====================
+EVIDENCE_DIR = os.getenv("SOCIALSCAN_EVIDENCE_DIR", "evidence")
+EVIDENCE_ZSTD_LEVEL = 10
+EVIDENCE_EXTENSIONS = {"zstd": "zst", "gzip": "gz"}
+REPARSE_WORKERS = 8
+
+# Never archive credentials sent back by Instagram
+EVIDENCE_SKIP_HEADERS = {"set-cookie"}
+
+def new_scrape_id():
+    """Identifier tying together all responses captured by one scrape."""
+    return uuid.uuid4().hex
+
+def _evidence_path(digest, codec):
+    """Content-addressed blob location, fanned out by hash prefix."""
+    return os.path.join(EVIDENCE_DIR, digest[:2], digest[2:4], f"{digest}.{EVIDENCE_EXTENSIONS[codec]}")
+
+def store_evidence_blob(digest, body):
+    """
+    Compress and store a response body under its SHA-256 unless it is already archived.
+
+    Returns:
+        bool: True if a new blob was written, False if it was already stored
+    """
+    existing = evidence_blobs.find_one({"_id": digest}, {"codec": 1})
+    if existing and os.path.exists(_evidence_path(digest, existing["codec"])):
+        return False
+
+    # Prefer zstd; fall back to gzip when zstandard is not installed
+    if zstandard is not None:
+        codec, compressed = "zstd", zstandard.ZstdCompressor(level=EVIDENCE_ZSTD_LEVEL).compress(body)
+    else:
+        codec, compressed = "gzip", gzip.compress(body)
+
+    path = _evidence_path(digest, codec)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(compressed)
+    os.replace(tmp_path, path)
+
+    evidence_blobs.update_one(
+        {"_id": digest},
+        {"$set": {"codec": codec, "size": len(body), "compressed_size": len(compressed)},
+         "$setOnInsert": {"first_seen": time.time()}},
+        upsert=True
+    )
+    return True
+
+def load_evidence_body(digest):
+    """Read an archived body, verifying it still hashes to its address."""
+    blob = evidence_blobs.find_one({"_id": digest}, {"codec": 1})
+    if not blob:
+        raise FileNotFoundError(f"Evidence blob {digest} is not archived")
+
+    with open(_evidence_path(digest, blob["codec"]), "rb") as f:
+        compressed = f.read()
+    if blob["codec"] == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd evidence blobs")
+        body = zstandard.ZstdDecompressor().decompress(compressed)
+    else:
+        body = gzip.decompress(compressed)
+
+    if hashlib.sha256(body).hexdigest() != digest:
+        raise ValueError(f"Evidence blob {digest} failed its integrity check")
+    return body
+
+def archive_response(response, kind, username, scrape_id, post_id=None):
+    """
+    Store a raw HTTP response body in the evidence archive with its capture metadata.
+
+    Archiving never interrupts a scrape; failures are reported as warnings.
+
+    Returns:
+        str: SHA-256 of the body, or None if it could not be archived
+    """
+    if evidence_captures is None:
+        return None
+
+    try:
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        with metrics.timer("evidence_write"):
+            ensure_indexes(db.name)
+            stored = store_evidence_blob(digest, body)
+            evidence_captures.insert_one({
+                "sha256": digest,
+                "kind": kind,
+                "username": username,
+                "post_id": post_id,
+                "scrape_id": scrape_id,
+                "method": response.request.method,
+                "url": str(response.request.url),
+                "status_code": response.status_code,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() not in EVIDENCE_SKIP_HEADERS},
+                "size": len(body),
+                "captured_at": time.time(),
+            })
+        # Identical payloads are stored once; count them as hits
+        record_cache_lookup("evidence_blob", not stored)
+        return digest
+    except Exception as e:
+        st.warning(f"Could not archive {kind} response for {username}: {e}")
+        return None
+
+def rebuild_from_archive(username, scrape_id=None):
+    """
+    Rebuild user_info and images from archived responses without touching the network.
+
+    Args:
+        username: Username the responses were captured for
+        scrape_id: Scrape to rebuild (default: the latest successful one)
+
+    Returns:
+        tuple: (user_info dict, images list, capture timestamp)
+    """
+    query = {"kind": "profile", "username": username, "status_code": 200}
+    if scrape_id:
+        query["scrape_id"] = scrape_id
+    capture = evidence_captures.find_one(query, sort=[("captured_at", -1)])
+    if not capture:
+        return {"Error": f"No archived profile response for '{username}'"}, [], None
+
+    user, nodes = parse_profile_response(json.loads(load_evidence_body(capture["sha256"])))
+    if "Error" in user:
+        return user, [], None
+
+    comment_digests = {
+        c["post_id"]: c["sha256"]
+        for c in evidence_captures.find(
+            {"scrape_id": capture["scrape_id"], "kind": "comments", "status_code": 200},
+            {"post_id": 1, "sha256": 1}
+        )
+    }
+
+    images = []
+    for node in nodes:
+        digest = comment_digests.get(node.get("id", "N/A"))
+        comments = parse_comments_response(json.loads(load_evidence_body(digest))) if digest else []
+        images.append(parse_post_node(node, comments))
+
+    return user, images, capture["captured_at"]
+
+def reparse_archive(usernames=None):
+    """
+    Rebuild and save user documents for usernames (default: every archived profile).
+
+    Returns:
+        tuple: (rebuilt usernames, list of (username, error))
+    """
+    if not usernames:
+        usernames = evidence_captures.distinct("username", {"kind": "profile", "status_code": 200})
+
+    rebuilt = []
+    failed = []
+    # Decompression and parsing run in parallel; saves stay on this thread
+    with ThreadPoolExecutor(max_workers=REPARSE_WORKERS) as executor:
+        futures = {executor.submit(rebuild_from_archive, username): username for username in usernames}
+        for future in as_completed(futures):
+            username = futures[future]
+            try:
+                user_info, images, captured_at = future.result()
+            except Exception as e:
+                failed.append((username, str(e)))
+                continue
+            if "Error" in user_info:
+                failed.append((username, user_info["Error"]))
+            elif save_to_mongo(user_info, images, timestamp=captured_at):
+                rebuilt.append(username)
+            else:
+                failed.append((username, "Failed to save"))
+
+    return rebuilt, failed
+
 # ===================== SCRAPER FUNCTION =====================
-def scrape_user(username: str):
+def parse_profile_response(data):
+    """
+    Parse a web_profile_info response body.
+
+    Returns:
+        tuple: (user_info dict, list of media nodes); user_info holds "Error" if the body is unusable
+    """
+    # Check for valid user data
+    if "data" not in data or "user" not in data.get("data", {}):
+        return {"Error": "Invalid response format from Instagram API"}, []
+        
+    user_info = data.get("data", {}).get("user", {})
+    if not user_info:
+        return {"Error": "User not found or unable to retrieve data"}, []
+
+    # Extract user profile information
+    user = {
+        "Username": user_info.get("username", "N/A"),
+        "Full Name": user_info.get("full_name", "N/A"),
+        "ID": user_info.get("id", "N/A"),
+        "Category": user_info.get("category_name", "N/A"),
+        "Business Category": user_info.get("business_category_name", "N/A"),
+        "Phone": user_info.get("business_phone_number", "N/A"),
+        "Email": user_info.get("business_email", "N/A"),
+        "Biography": user_info.get("biography", "N/A"),
+        "Bio Links": [],  # Initialize as empty list to avoid potential errors
+        "Homepage": user_info.get("external_url", "N/A"),
+        "Followers": "N/A",
+        "Following": "N/A",
+        "Facebook ID": user_info.get("fbid", "N/A"),
+        "Is Private": user_info.get("is_private", False),
+        "Is Verified": user_info.get("is_verified", False),
+        "Profile Image": user_info.get("profile_pic_url_hd", "N/A"),
+        "Image Count": 0,
+    }
+    
+    # Safely extract bio links
+    if "bio_links" in user_info and isinstance(user_info["bio_links"], list):
+        user["Bio Links"] = [link.get("url") for link in user_info["bio_links"] if isinstance(link, dict) and "url" in link]
+    
+    # Safely extract follower and following counts
+    if "edge_followed_by" in user_info and isinstance(user_info["edge_followed_by"], dict) and "count" in user_info["edge_followed_by"]:
+        user["Followers"] = f"{user_info['edge_followed_by']['count']:,}"
+    
+    if "edge_follow" in user_info and isinstance(user_info["edge_follow"], dict) and "count" in user_info["edge_follow"]:
+        user["Following"] = f"{user_info['edge_follow']['count']:,}"
+    
+    # Safely extract image count and media nodes
+    nodes = []
+    if "edge_owner_to_timeline_media" in user_info and isinstance(user_info["edge_owner_to_timeline_media"], dict):
+        user["Image Count"] = user_info["edge_owner_to_timeline_media"].get("count", 0)
+        for edge in user_info["edge_owner_to_timeline_media"].get("edges", []):
+            if isinstance(edge, dict) and "node" in edge:
+                nodes.append(edge["node"])  # Skip invalid entries
+    
+    return user, nodes
+
+def post_has_comments(node):
+    """Whether a media node reports comments worth fetching."""
+    return isinstance(node.get("edge_media_to_comment"), dict) and node["edge_media_to_comment"].get("count", 0) > 0
+
+def parse_comments_response(comment_data):
+    """Extract comment texts from a media comments response body."""
+    if "comments" in comment_data and isinstance(comment_data["comments"], list):
+        return [c.get("text", "") for c in comment_data["comments"] if isinstance(c, dict)]
+    return []
+
+def parse_post_node(node, comments):
+    """Build the stored post document from a media node and its comments."""
+    # Extract caption safely
+    caption = "N/A"
+    if ("edge_media_to_caption" in node and 
+        isinstance(node["edge_media_to_caption"], dict) and 
+        "edges" in node["edge_media_to_caption"] and 
+        len(node["edge_media_to_caption"]["edges"]) > 0):
+        
+        caption_node = node["edge_media_to_caption"]["edges"][0].get("node", {})
+        caption = caption_node.get("text", "N/A") if isinstance(caption_node, dict) else "N/A"
+    
+    # Extract likes count safely
+    likes_count = 0
+    if "edge_liked_by" in node and isinstance(node["edge_liked_by"], dict):
+        likes_count = node["edge_liked_by"].get("count", 0)
+    
+    return {
+        "ID": node.get("id", "N/A"),
+        "Source": node.get("display_url", "N/A"),
+        "Likes": likes_count,
+        "Caption": caption,
+        "Timestamp": node.get("taken_at_timestamp"),
+        "Comments": comments
+    }
+
+def scrape_user(username: str, http_client=None, profile_response=None):
     """
     Scrape Instagram user profile and posts.
+
+    Every raw API response is stored in the evidence archive before parsing.
     
     Args:
         username: Instagram username to scrape
+        http_client: Session to scrape with (default: the shared client)
+        profile_response: Already fetched web_profile_info response to reuse instead of requesting it again
         
     Returns:
         tuple: (user_info dict, images list)
@@ -186,109 +735,50 @@ def scrape_user(username: str):
         return {"Error": "Username is required"}, []
         
     try:
+        scrape_id = new_scrape_id()
+
         # Make API request to Instagram
-        response = client.get(f"https://i.instagram.com/api/v1/users/web_profile_info/?username={username}")
+        response = profile_response or instagram_get(
+            f"{INSTAGRAM_API_BASE}/api/v1/users/web_profile_info/?username={username}",
+            "instagram_profile",
+            http_client
+        )
+        archive_response(response, "profile", username, scrape_id)
 
         # Check response status
         if response.status_code != 200:
-            return {"Error": f"Failed to retrieve data. Status code: {response.status_code}"}, []
+            return {
+                "Error": f"Failed to retrieve data. Status code: {response.status_code}",
+                "Status Code": response.status_code,
+            }, []
 
         # Parse response data
-        data = response.json()
-        
-        # Check for valid user data
-        if "data" not in data or "user" not in data.get("data", {}):
-            return {"Error": "Invalid response format from Instagram API"}, []
-            
-        user_info = data.get("data", {}).get("user", {})
-        if not user_info:
-            return {"Error": "User not found or unable to retrieve data"}, []
-
-        # Extract user profile information
-        user = {
-            "Username": user_info.get("username", "N/A"),
-            "Full Name": user_info.get("full_name", "N/A"),
-            "ID": user_info.get("id", "N/A"),
-            "Category": user_info.get("category_name", "N/A"),
-            "Business Category": user_info.get("business_category_name", "N/A"),
-            "Phone": user_info.get("business_phone_number", "N/A"),
-            "Email": user_info.get("business_email", "N/A"),
-            "Biography": user_info.get("biography", "N/A"),
-            "Bio Links": [],  # Initialize as empty list to avoid potential errors
-            "Homepage": user_info.get("external_url", "N/A"),
-            "Followers": "N/A",
-            "Following": "N/A",
-            "Facebook ID": user_info.get("fbid", "N/A"),
-            "Is Private": user_info.get("is_private", False),
-            "Is Verified": user_info.get("is_verified", False),
-            "Profile Image": user_info.get("profile_pic_url_hd", "N/A"),
-            "Image Count": 0,
-        }
-        
-        # Safely extract bio links
-        if "bio_links" in user_info and isinstance(user_info["bio_links"], list):
-            user["Bio Links"] = [link.get("url") for link in user_info["bio_links"] if isinstance(link, dict) and "url" in link]
-        
-        # Safely extract follower and following counts
-        if "edge_followed_by" in user_info and isinstance(user_info["edge_followed_by"], dict) and "count" in user_info["edge_followed_by"]:
-            user["Followers"] = f"{user_info['edge_followed_by']['count']:,}"
-        
-        if "edge_follow" in user_info and isinstance(user_info["edge_follow"], dict) and "count" in user_info["edge_follow"]:
-            user["Following"] = f"{user_info['edge_follow']['count']:,}"
-        
-        # Safely extract image count
-        if "edge_owner_to_timeline_media" in user_info and isinstance(user_info["edge_owner_to_timeline_media"], dict):
-            user["Image Count"] = user_info["edge_owner_to_timeline_media"].get("count", 0)
+        user, nodes = parse_profile_response(response.json())
+        if "Error" in user:
+            return user, []
         
         # Extract user's media/posts
         image_info = []
-        
-        # Check if media data exists and is in expected format
-        if "edge_owner_to_timeline_media" in user_info and isinstance(user_info["edge_owner_to_timeline_media"], dict):
-            image_edges = user_info["edge_owner_to_timeline_media"].get("edges", [])
+        for node in nodes:
+            post_id = node.get("id", "N/A")
             
-            for edge in image_edges:
-                if not isinstance(edge, dict) or "node" not in edge:
-                    continue  # Skip invalid entries
-                
-                node = edge["node"]
-                post_id = node.get("id", "N/A")
-                
-                # Extract comments if available
-                comments = []
-                if isinstance(node.get("edge_media_to_comment"), dict) and node["edge_media_to_comment"].get("count", 0) > 0:
-                    try:
-                        comment_req = client.get(f"https://i.instagram.com/api/v1/media/{post_id}/comments/")
-                        if comment_req.status_code == 200:
-                            comment_data = comment_req.json()
-                            if "comments" in comment_data and isinstance(comment_data["comments"], list):
-                                comments = [c.get("text", "") for c in comment_data["comments"] if isinstance(c, dict)]
-                    except Exception as e:
-                        st.warning(f"Could not fetch comments for post {post_id}: {e}")
-                
-                # Extract caption safely
-                caption = "N/A"
-                if ("edge_media_to_caption" in node and 
-                    isinstance(node["edge_media_to_caption"], dict) and 
-                    "edges" in node["edge_media_to_caption"] and 
-                    len(node["edge_media_to_caption"]["edges"]) > 0):
-                    
-                    caption_node = node["edge_media_to_caption"]["edges"][0].get("node", {})
-                    caption = caption_node.get("text", "N/A") if isinstance(caption_node, dict) else "N/A"
-                
-                # Extract likes count safely
-                likes_count = 0
-                if "edge_liked_by" in node and isinstance(node["edge_liked_by"], dict):
-                    likes_count = node["edge_liked_by"].get("count", 0)
-                
-                # Add post information to collection
-                image_info.append({
-                    "ID": post_id,
-                    "Source": node.get("display_url", "N/A"),
-                    "Likes": likes_count,
-                    "Caption": caption,
-                    "Comments": comments
-                })
+            # Extract comments if available
+            comments = []
+            if post_has_comments(node):
+                try:
+                    comment_req = instagram_get(
+                        f"{INSTAGRAM_API_BASE}/api/v1/media/{post_id}/comments/",
+                        "instagram_comments",
+                        http_client
+                    )
+                    archive_response(comment_req, "comments", username, scrape_id, post_id)
+                    if comment_req.status_code == 200:
+                        comments = parse_comments_response(comment_req.json())
+                except Exception as e:
+                    st.warning(f"Could not fetch comments for post {post_id}: {e}")
+            
+            # Add post information to collection
+            image_info.append(parse_post_node(node, comments))
 
         # Return collected data
         return user, image_info
@@ -299,8 +789,13 @@ def scrape_user(username: str):
         return {"Error": f"An error occurred: {str(e)}"}, []
 
 # ===================== SAVE TO MONGO =====================
-def save_to_mongo(user_info, images):
-    """Save scraped user data to MongoDB."""
+def save_to_mongo(user_info, images, timestamp=None):
+    """
+    Save scraped user data to MongoDB, stamped with timestamp (default: now).
+
+    The user document holds only the profile header; posts and comments are
+    upserted into their own collections so the header stays small.
+    """
     if collection is None:
         st.error("MongoDB connection not available")
         return False
@@ -315,46 +810,241 @@ def save_to_mongo(user_info, images):
         # Prepare data for MongoDB
         user_data = {
             "user_info": user_info,
-            "images": images,
-            "timestamp": time.time(),
+            "timestamp": timestamp or time.time(),
         }
 
+        # Triage score so suspicious accounts can be prioritized before any LLM call
+        try:
+            user_data["bot_score"], user_data["bot_reasons"] = score_profile(user_info, images)
+        except Exception as e:
+            st.warning(f"Could not compute bot score: {e}")
+
         # Check if user already exists in database
         username = user_info.get("Username")
         if not username or username == "N/A":
             st.error("Invalid username in user data")
             return False
             
-        existing = collection.find_one({"user_info.Username": username})
-        
-        # Update or insert data
-        if existing:
-            collection.update_one({"user_info.Username": username}, {"$set": user_data})
-            st.success(f"User data for '{username}' updated in MongoDB.")
-        else:
-            collection.insert_one(user_data)
-            st.success(f"Data for '{username}' saved to MongoDB.")
+        with metrics.timer("mongo_write"):
+            ensure_indexes(db.name)
+            save_posts(profile_key(user_info), images)
+
+            # Update or insert data, dropping any embedded posts left from the old layout
+            result = collection.update_one(
+                {"user_info.Username": username},
+                {"$set": user_data, "$unset": {"images": ""}},
+                upsert=True
+            )
+        existing = result.matched_count > 0
+        st.success(f"User data for '{username}' updated in MongoDB." if existing else f"Data for '{username}' saved to MongoDB.")
         return True
     except Exception as e:
         st.error(f"Failed to save to MongoDB: {e}")
         return False
 
+# ===================== POST STORAGE =====================
+POST_FIELDS = ["ID", "Source", "Likes", "Caption", "Timestamp"]
+MIGRATION_BATCH_SIZE = 100
+
+def profile_key(user_info):
+    """Key that ties posts and comments to a profile: the Instagram ID, else the username."""
+    profile_id = user_info.get("ID")
+    return str(profile_id) if profile_id and profile_id != "N/A" else f"username:{user_info.get('Username')}"
+
+def _comments_hash(comments):
+    """Fingerprint of a post's comments, so unchanged comment lists are not rewritten."""
+    return hashlib.sha256(json.dumps(comments, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def save_posts(profile_id, images):
+    """
+    Upsert posts and their comments for one profile.
+
+    Posts missing from images are kept, so history survives rescrapes that only
+    return the newest posts. Comments are rewritten only for posts whose comment list changed.
+    """
+    if not images:
+        return
+
+    post_ids = [str(image.get("ID", "N/A")) for image in images]
+    stored_hashes = {
+        post["ID"]: post.get("comments_hash")
+        for post in posts_collection.find(
+            {"profile_id": profile_id, "ID": {"$in": post_ids}},
+            {"ID": 1, "comments_hash": 1}
+        )
+    }
+
+    post_writes = []
+    changed_posts = []
+    new_comments = []
+    for post_id, image in zip(post_ids, images):
+        comments = image.get("Comments", [])
+        comments_hash = _comments_hash(comments)
+        fields = {key: image.get(key) for key in POST_FIELDS}
+        fields.update({"ID": post_id, "Comment Count": len(comments), "comments_hash": comments_hash})
+        post_writes.append(UpdateOne(
+            {"profile_id": profile_id, "ID": post_id},
+            {"$set": fields},
+            upsert=True
+        ))
+
+        if stored_hashes.get(post_id) != comments_hash:
+            changed_posts.append(post_id)
+            new_comments.extend(
+                {"profile_id": profile_id, "post_id": post_id, "position": position, "text": text}
+                for position, text in enumerate(comments)
+            )
+
+    posts_collection.bulk_write(post_writes, ordered=False)
+    if changed_posts:
+        comments_collection.delete_many({"profile_id": profile_id, "post_id": {"$in": changed_posts}})
+        if new_comments:
+            comments_collection.insert_many(new_comments, ordered=False)
+
+def load_comments(profile_id, post_ids=None):
+    """
+    Load comments for a profile, optionally only for some posts.
+
+    Returns:
+        dict: post ID -> list of comment texts in their original order
+    """
+    query = {"profile_id": profile_id}
+    if post_ids is not None:
+        query["post_id"] = {"$in": [str(post_id) for post_id in post_ids]}
+
+    comments = {}
+    cursor = comments_collection.find(query, {"_id": 0, "post_id": 1, "text": 1}).sort(
+        [("post_id", 1), ("position", 1)]
+    )
+    for comment in cursor:
+        comments.setdefault(comment["post_id"], []).append(comment["text"])
+    return comments
+
+def load_posts(profile_id, fields=None, skip=0, limit=0, with_comments=False):
+    """
+    Load a profile's posts, newest first, in the same shape scrape_user returns.
+
+    Args:
+        profile_id: Key from profile_key()
+        fields: Post fields to load (default: all of POST_FIELDS)
+        skip, limit: Page of posts to load (limit 0 loads all)
+        with_comments: Attach each post's "Comments"; otherwise only "Comment Count" is loaded
+    """
+    projection = {"_id": 0, "ID": 1, "Comment Count": 1}
+    projection.update({field: 1 for field in (fields or POST_FIELDS)})
+    cursor = posts_collection.find({"profile_id": profile_id}, projection).sort(
+        [("Timestamp", -1), ("ID", -1)]
+    ).skip(skip).limit(limit)
+    posts = list(cursor)
+
+    if with_comments:
+        comments = load_comments(profile_id, [post["ID"] for post in posts])
+        for post in posts:
+            post.pop("Comment Count", None)
+            post["Comments"] = comments.get(post["ID"], [])
+    return posts
+
+def load_user_posts(user_data, fields=None, with_comments=False, skip=0, limit=0):
+    """Posts of a loaded user document, from the posts collection or, before migration, embedded."""
+    if "images" in user_data:
+        return user_data["images"][skip:skip + limit] if limit else user_data["images"][skip:]
+    return load_posts(
+        profile_key(user_data.get("user_info", {})),
+        fields=fields, skip=skip, limit=limit, with_comments=with_comments
+    )
+
+def count_user_posts(user_data):
+    """Number of posts load_user_posts would return for a loaded user document."""
+    if "images" in user_data:
+        return len(user_data["images"])
+    return posts_collection.count_documents({"profile_id": profile_key(user_data.get("user_info", {}))})
+
+def migrate_embedded_posts():
+    """
+    Move posts embedded in user documents into the posts and comments collections.
+
+    Returns:
+        int: number of user documents migrated
+    """
+    ensure_indexes(db.name)
+    migrated = 0
+    while True:
+        batch = list(collection.find({"images": {"$exists": True}}, {"user_info": 1, "images": 1}).limit(MIGRATION_BATCH_SIZE))
+        if not batch:
+            return migrated
+        for user_data in batch:
+            save_posts(profile_key(user_data.get("user_info", {})), user_data.get("images") or [])
+            collection.update_one({"_id": user_data["_id"]}, {"$unset": {"images": ""}})
+            migrated += 1
+
 # ===================== FETCH IMAGE =====================
-def fetch_image(url):
-    """Fetch an image from URL and return PIL Image object."""
-    if not url or url == "N/A":
-        return create_placeholder_image()
-        
-    try:
+IMAGE_FETCH_WORKERS = 8
+IMAGE_CACHE_SIZE = 256            # Downloads kept in memory across reruns
+IMAGE_FETCH_TIMEOUT = 20          # Seconds to wait for background downloads in one run
+MEDIA_PAGE_SIZE = 12
+
+def fetch_image_bytes(url):
+    """Download raw image bytes without touching the UI, so it can run in a worker thread."""
+    with metrics.timer("image_download"):
         res = client.get(url, timeout=5)
-        if res.status_code == 200:
-            return Image.open(BytesIO(res.content))
-        else:
-            st.warning(f"Failed to load image from {url}: Status code {res.status_code}")
-            return create_placeholder_image()
-    except Exception as e:
-        st.warning(f"Error loading image: {e}")
-        return create_placeholder_image()
+    metrics.inc("socialscan_http_bytes_total", len(res.content), stage="image_download")
+    res.raise_for_status()
+    return res.content
+
+@st.cache_resource
+def get_image_loader():
+    """Thread pool and LRU of image downloads, shared across reruns and sessions."""
+    return {
+        "executor": ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS),
+        "futures": OrderedDict(),
+        "lock": threading.Lock(),
+    }
+
+def fetch_image_async(url):
+    """Start, or reuse, a background download of url and return its future."""
+    loader = get_image_loader()
+    with loader["lock"]:
+        futures = loader["futures"]
+        future = futures.get(url)
+        # Retry downloads that failed on an earlier run
+        reusable = future is not None and not (future.done() and future.exception() is not None)
+        record_cache_lookup("image", reusable)
+        if not reusable:
+            future = loader["executor"].submit(fetch_image_bytes, url)
+            futures[url] = future
+        futures.move_to_end(url)
+        while len(futures) > IMAGE_CACHE_SIZE:
+            futures.popitem(last=False)
+    return future
+
+def defer_image(url, pending):
+    """Show a placeholder now and queue the real image to replace it once downloaded."""
+    placeholder = st.empty()
+    placeholder.image(create_placeholder_image(), use_container_width=True)
+    if url and url != "N/A":
+        pending.append((placeholder, fetch_image_async(url)))
+    else:
+        placeholder.image(create_placeholder_image(), caption="Image not available", use_container_width=True)
+
+def render_deferred_images(pending):
+    """Replace placeholders with their images as the background downloads complete."""
+    placeholders = {}
+    for placeholder, future in pending:
+        placeholders.setdefault(future, []).append(placeholder)
+
+    try:
+        for future in as_completed(placeholders, timeout=IMAGE_FETCH_TIMEOUT):
+            try:
+                img = Image.open(BytesIO(future.result()))
+                for placeholder in placeholders[future]:
+                    placeholder.image(img, use_container_width=True)
+            except Exception:
+                for placeholder in placeholders[future]:
+                    placeholder.image(create_placeholder_image(), caption="Image not available", use_container_width=True)
+    except FutureTimeoutError:
+        # Slow images keep their placeholder; the download finishes in the background for the next rerun
+        pass
+    pending.clear()
 
 def create_placeholder_image():
     """Create a placeholder image when actual image cannot be loaded."""
@@ -371,8 +1061,14 @@ def create_placeholder_image():
         return Image.new('RGB', (100, 100), color='gray')
 
 # ===================== DISPLAY FUNCTIONS =====================
-def display_user_info(user_info):
-    """Display user profile information in the UI."""
+def display_user_info(user_info, pending=None):
+    """
+    Display user profile information in the UI.
+
+    The profile picture is downloaded in the background. Pass a shared pending list to
+    fill it in later with render_deferred_images(); otherwise it is filled in before returning.
+    """
+    deferred = pending if pending is not None else []
     st.subheader("📋 User Information")
     
     # Check for errors
@@ -412,25 +1108,72 @@ def display_user_info(user_info):
         # Display profile image
         if "Profile Image" in user_info and user_info["Profile Image"] and user_info["Profile Image"] != "N/A":
             st.subheader("Profile Picture")
-            img = fetch_image(user_info["Profile Image"])
-            st.image(img, use_container_width=True)
+            defer_image(user_info["Profile Image"], deferred)
     
     except Exception as e:
         st.error(f"Error displaying user information: {e}")
         st.write("Raw user data:", user_info)
 
-def display_media_grid(media_list, columns=3):
-    """Display media posts in a grid layout."""
+    if pending is None:
+        render_deferred_images(deferred)
+
+def display_media_grid(media_list, columns=3, page_size=MEDIA_PAGE_SIZE, key="media", pending=None, profile_id=None,
+                       load_page=None, total=None):
+    """
+    Display one page of media posts in a grid layout.
+
+    Only the current page's tiles are built. Images show placeholders immediately and are
+    downloaded in the background, with the next page prefetched. Pass a shared pending list
+    to fill images in later with render_deferred_images(). Posts loaded without comments
+    get them from MongoDB for the current page only, using profile_id.
+
+    Instead of media_list, pass load_page(skip, limit) and the total post count to load
+    only the shown page and the next one.
+    """
     st.subheader("🖼 Latest Posts")
+    n_posts = total if load_page is not None else len(media_list or [])
     
     # Check for empty media list
-    if not media_list:
+    if not n_posts:
         st.warning("No media found.")
         return
+
+    deferred = pending if pending is not None else []
     
     try:
+        # Page controls; the current page survives reruns in session state
+        page_key = f"{key}_page"
+        n_pages = max(1, math.ceil(n_posts / page_size))
+        page = min(st.session_state.get(page_key, 0), n_pages - 1)
+        if n_pages > 1:
+            prev_col, info_col, next_col = st.columns([1, 3, 1])
+            if prev_col.button("◀ Previous", key=f"{key}_prev", disabled=page == 0):
+                page -= 1
+            if next_col.button("Next ▶", key=f"{key}_next", disabled=page >= n_pages - 1):
+                page += 1
+            info_col.caption(f"Page {page + 1} of {n_pages} · {n_posts} posts")
+        st.session_state[page_key] = page
+
+        # This page plus the next, whose images are prefetched
+        if load_page is not None:
+            with metrics.timer("mongo_read"):
+                window = load_page(page * page_size, 2 * page_size)
+        else:
+            window = media_list[page * page_size:(page + 2) * page_size]
+        page_media, next_media = window[:page_size], window[page_size:]
+
+        # Fetch comments for this page only when posts were loaded without them
+        needs_comments = [m["ID"] for m in page_media if "Comments" not in m and m.get("Comment Count")]
+        if needs_comments and profile_id and comments_collection is not None:
+            with metrics.timer("mongo_read"):
+                page_comments = load_comments(profile_id, needs_comments)
+            page_media = [
+                dict(m, Comments=page_comments.get(m["ID"], [])) if m.get("ID") in page_comments else m
+                for m in page_media
+            ]
+
         # Create rows for the grid view
-        media_rows = [media_list[i:i+columns] for i in range(0, len(media_list), columns)]
+        media_rows = [page_media[i:i+columns] for i in range(0, len(page_media), columns)]
         
         # Display each row
         for row in media_rows:
@@ -442,13 +1185,7 @@ def display_media_grid(media_list, columns=3):
                 if idx < len(cols):  # Ensure we stay within bounds
                     with cols[idx]:
                         try:
-                            # Only fetch and display image if Source exists and is valid
-                            if "Source" in media and media["Source"] and media["Source"] != "N/A":
-                                img = fetch_image(media["Source"])
-                                st.image(img, use_container_width=True)
-                            else:
-                                st.image(create_placeholder_image(), use_container_width=True)
-                                st.caption("Image not available")
+                            defer_image(media.get("Source"), deferred)
                             
                             # Display post details
                             likes = media.get("Likes", 0)
@@ -471,10 +1208,19 @@ def display_media_grid(media_list, columns=3):
                                         
                         except Exception as e:
                             st.error(f"Error displaying media item: {e}")
+
+        # Warm the cache with the next page so paging forward is instant
+        for media in next_media:
+            if media.get("Source") and media["Source"] != "N/A":
+                fetch_image_async(media["Source"])
                 
     except Exception as e:
         st.error(f"Error displaying media grid: {e}")
-        st.write("Raw media data:", media_list[:1])  # Show just first item to avoid clutter
+        if media_list:
+            st.write("Raw media data:", media_list[:1])  # Show just first item to avoid clutter
+
+    if pending is None:
+        render_deferred_images(deferred)
 
 # ===================== ANALYSIS FUNCTIONS =====================
 def analyze_behavior(username):
@@ -485,7 +1231,8 @@ def analyze_behavior(username):
     
     try:
         # Load user data from MongoDB
-        user_data = collection.find_one({"user_info.Username": username})
+        with metrics.timer("mongo_read"):
+            user_data = collection.find_one({"user_info.Username": username})
         if not user_data:
             st.error(f"No data found for user: {username}")
             return None
@@ -502,7 +1249,8 @@ def analyze_behavior(username):
             'related_profiles': user_info.get("Related Profiles", "None"),
             'is_verified': user_info.get("Is Verified", False),
             'profile_image': user_info.get("Profile Image", "N/A"),
-            'external_url': user_info.get("Homepage", "N/A")
+            'external_url': user_info.get("Homepage", "N/A"),
+            'bot_score': user_data.get("bot_score")
         }
 
         # Process engagement data
@@ -510,7 +1258,10 @@ def analyze_behavior(username):
         total_likes = 0
         valid_posts = 0
 
-        for image in user_data.get("images", []):
+        with metrics.timer("mongo_read"):
+            images = load_user_posts(user_data, fields=["ID", "Source", "Likes", "Caption"], with_comments=True)
+
+        for image in images:
             likes = image.get("Likes", 0)
             caption = image.get("Caption", "")
             
@@ -625,36 +1376,344 @@ def format_analysis_response(analysis_type, profile_data, engagement_data, query
         - Bio: {profile_data['biography'][:150]}...
         """
 
-def generate_prompt(username, analysis_type, custom_query=""):
-    """Generate tailored prompts for Groq's LLaMA model."""
-    behavior = analyze_behavior(username)
-    if not behavior:
-        return "No data available for analysis."
+# ===================== PROMPT BUILDER =====================
+MODEL_NAME = "llama3-70b-8192"
+MODEL_CONTEXT_TOKENS = 8192
+COMPLETION_MAX_TOKENS = 1024
+PROMPT_TOKEN_BUDGET = 3000        # Tokens available for captions and comments in one prompt
+CAPTION_TOKEN_LIMIT = 120         # Longest caption kept per post
+COMMENT_TOKEN_LIMIT = 40          # Longest comment kept
+MAX_COMMENTS_PER_POST = 5
+COMMENT_SIMILARITY_THRESHOLD = 0.9
 
-    # Base context
-    context = f"""
-    Analyze Instagram account @{username} with:
-    - {behavior['profile']['followers']} followers
-    - Category: {behavior['profile']['category']}
-    - Avg. likes: {behavior['engagement']['avg_likes']:,.0f}
-    - Verified: {behavior['profile']['is_verified']}
+_token_encoder = None
+
+def count_tokens(text):
+    """Count tokens in text, estimating ~4 characters per token when tiktoken is unavailable."""
+    global _token_encoder
+    if not text:
+        return 0
+    if tiktoken is not None:
+        if _token_encoder is None:
+            _token_encoder = tiktoken.get_encoding("cl100k_base")
+        return len(_token_encoder.encode(text))
+    return (len(text) + 3) // 4
+
+def truncate_to_tokens(text, max_tokens):
+    """Truncate text to at most max_tokens, cutting on a word boundary."""
+    text = str(text or "")
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 1:
+        return ""
+
+    # Keep one token free for the ellipsis
+    if tiktoken is not None:
+        cut = _token_encoder.decode(_token_encoder.encode(text)[:max_tokens - 1])
+    else:
+        cut = text[:(max_tokens - 1) * 4]
+
+    # Drop the partial last word
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip() + "…"
+
+def _normalize_comment(comment):
+    """Reduce a comment to lowercase words without mentions or punctuation."""
+    text = re.sub(r"@[\w.]+", "", str(comment).lower())
+    text = re.sub(r"[^\w\s]", "", text)
+    return " ".join(text.split())
+
+def deduplicate_comments(comments, threshold=COMMENT_SIMILARITY_THRESHOLD):
+    """Drop empty, identical and near-identical comments, keeping the first occurrence."""
+    unique = []
+    seen_keys = []
+    for comment in comments:
+        key = _normalize_comment(comment)
+        if not key or key in seen_keys:
+            continue
+        if any(
+            difflib.SequenceMatcher(None, key, other).quick_ratio() >= threshold and
+            difflib.SequenceMatcher(None, key, other).ratio() >= threshold
+            for other in seen_keys
+        ):
+            continue
+        seen_keys.append(key)
+        unique.append(str(comment).strip())
+    return unique
+
+def format_post_block(post, label, token_budget, with_engagement=True):
     """
+    Format one post's caption and de-duplicated comments within a token budget.
 
-    # Type-specific prompts
-    prompts = {
-        "Content Strategy": f"""
-        {context}
-        Provide detailed content strategy recommendations focusing on:
-        1. Content themes that resonate with current audience
-        2. Optimal posting frequency based on engagement patterns
-        3. Caption strategies that drive engagement
-        4. Visual content improvements
-        """,
-        
-        "Engagement Patterns": f"""
-        {context}
-        Analyze engagement patterns considering:
-        1. Best performing content types
+    with_engagement=False leaves the like and comment counts out of the header.
+
+    Returns:
+        tuple: (text, tokens used, comments included), or None if even the caption does not fit
+    """
+    comments = post.get('comments', [])
+    if with_engagement:
+        label = f"{label} ({post.get('likes', 0):,} likes, {len(comments)} comments)"
+    lines = [
+        label,
+        f"Caption: {truncate_to_tokens(post.get('caption', ''), CAPTION_TOKEN_LIMIT)}",
+    ]
+    cost = count_tokens("\n".join(lines)) + 1
+    if cost > token_budget:
+        return None
+
+    n_comments = 0
+    unique_comments = deduplicate_comments(comments)[:MAX_COMMENTS_PER_POST]
+    if unique_comments and cost + 2 <= token_budget:
+        lines.append("Comments:")
+        cost += 2
+        for comment in unique_comments:
+            line = f"- {truncate_to_tokens(comment, COMMENT_TOKEN_LIMIT)}"
+            line_cost = count_tokens(line) + 1
+            if cost + line_cost > token_budget:
+                break
+            lines.append(line)
+            cost += line_cost
+            n_comments += 1
+
+    return "\n".join(lines), cost, n_comments
+
+def build_post_context(posts, token_budget=PROMPT_TOKEN_BUDGET):
+    """
+    Pack the most engaging captions and comments into a token budget.
+
+    Args:
+        posts: Post dicts as returned in analyze_behavior()['engagement']['all_posts']
+        token_budget: Maximum number of tokens the packed content may use
+
+    Returns:
+        tuple: (content text, stats dict)
+    """
+    # Rank by likes, breaking ties by comment count
+    ranked = sorted(
+        posts,
+        key=lambda p: (p.get('likes', 0), len(p.get('comments', []))),
+        reverse=True
+    )
+
+    blocks = []
+    used = 0
+    comments_included = 0
+
+    for rank, post in enumerate(ranked, 1):
+        block = format_post_block(post, f"Post {rank}", token_budget - used)
+
+        # Stop at the first post that no longer fits so ranking order is preserved
+        if block is None:
+            break
+
+        text, cost, n_comments = block
+        blocks.append(text)
+        used += cost
+        comments_included += n_comments
+
+    stats = {
+        'content_tokens': used,
+        'token_budget': token_budget,
+        'posts_included': len(blocks),
+        'posts_available': len(posts),
+        'comments_included': comments_included,
+    }
+    return "\n\n".join(blocks), stats
+
+# ===================== MAP-REDUCE SUMMARIZATION =====================
+CHUNK_TOKEN_BUDGET = 3000         # Post content per map call
+POST_TOKEN_LIMIT = 600            # Longest single post block inside a chunk
+SUMMARY_MAX_TOKENS = 300
+SUMMARY_WORKERS = 4
+
+CHUNK_SUMMARY_PROMPT = """Summarize the following Instagram posts and their comments in under 200 words.
+Cover recurring themes, tone, people or brands mentioned, and how the audience reacts.
+
+{content}"""
+
+REDUCE_SUMMARY_PROMPT = """Combine these partial summaries of one Instagram account into a single summary
+in under 200 words, keeping recurring themes, notable mentions and audience reactions.
+
+{content}"""
+
+def _post_sort_key(post):
+    """Sort key placing older posts first (Instagram media IDs increase over time)."""
+    post_id = str(post.get('post_id', ''))
+    return (0, int(post_id), "") if post_id.isdigit() else (1, 0, post_id)
+
+def pack_blocks(blocks, token_budget):
+    """Greedily pack text blocks, in order, into chunks of at most token_budget tokens."""
+    chunks = []
+    current = []
+    used = 0
+    for block in blocks:
+        cost = count_tokens(block) + 1
+        if current and used + cost > token_budget:
+            chunks.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(block)
+        used += cost
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def chunk_posts(posts, token_budget=CHUNK_TOKEN_BUDGET):
+    """
+    Split posts into chunks for summarization.
+
+    Posts are packed oldest first, so a new scrape only changes the newest chunks
+    and every earlier chunk keeps the same content hash. Chunks hold only post IDs,
+    captions and comment text; like and comment counts change on every rescrape
+    and would invalidate the cached summaries.
+    """
+    blocks = []
+    for post in sorted(posts, key=_post_sort_key):
+        block = format_post_block(
+            post,
+            f"Post {post.get('post_id', 'N/A')}",
+            POST_TOKEN_LIMIT,
+            with_engagement=False
+        )
+        if block is not None:
+            blocks.append(block[0])
+    return pack_blocks(blocks, token_budget)
+
+def _summary_cache_key(template, content):
+    """Content hash identifying a summary for a given model, prompt and chunk."""
+    digest = hashlib.sha256()
+    for part in (MODEL_NAME, template, content):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def _summarize_chunk(groq_client, template, content):
+    """Summarize one chunk, using the MongoDB cache when the same chunk was seen before."""
+    key = _summary_cache_key(template, content)
+    if summary_cache is not None:
+        with metrics.timer("mongo_read"):
+            cached = summary_cache.find_one({"_id": key}, {"summary": 1})
+        record_cache_lookup("chunk_summary", cached is not None)
+        if cached:
+            return cached["summary"], True
+
+    with metrics.timer("groq_completion"):
+        response = groq_client.chat.completions.create(
+            messages=[
+                {"role": "system", "content": "You are a professional social media analyst."},
+                {"role": "user", "content": template.format(content=content)}
+            ],
+            model=MODEL_NAME,
+            temperature=0.2,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            top_p=1
+        )
+    summary = response.choices[0].message.content.strip()
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        record_token_usage("chunk_summary", usage.prompt_tokens, usage.completion_tokens)
+
+    if summary_cache is not None:
+        with metrics.timer("mongo_write"):
+            summary_cache.update_one(
+                {"_id": key},
+                {"$set": {"summary": summary, "timestamp": time.time()}},
+                upsert=True
+            )
+    return summary, False
+
+def _summarize_chunks(groq_client, template, chunks):
+    """Summarize chunks in parallel, returning summaries in chunk order and the cache hit count."""
+    with ThreadPoolExecutor(max_workers=SUMMARY_WORKERS) as executor:
+        results = list(executor.map(lambda chunk: _summarize_chunk(groq_client, template, chunk), chunks))
+    return [summary for summary, _ in results], sum(1 for _, hit in results if hit)
+
+def summarize_posts(groq_client, posts, token_budget):
+    """
+    Map-reduce summarization of a profile's posts and comments.
+
+    Posts are chunked and each chunk is summarized in parallel (map). Summaries are
+    then merged level by level until they fit token_budget (reduce).
+
+    Returns:
+        tuple: (summary text, stats dict)
+    """
+    chunks = chunk_posts(posts)
+    summaries, cache_hits = _summarize_chunks(groq_client, CHUNK_SUMMARY_PROMPT, chunks)
+    stats = {'chunks': len(chunks), 'chunk_cache_hits': cache_hits, 'reduce_levels': 0}
+
+    while len(summaries) > 1 and count_tokens("\n\n".join(summaries)) > token_budget:
+        groups = pack_blocks(summaries, CHUNK_TOKEN_BUDGET)
+        summaries, hits = _summarize_chunks(groq_client, REDUCE_SUMMARY_PROMPT, groups)
+        stats['chunk_cache_hits'] += hits
+        stats['reduce_levels'] += 1
+
+    return truncate_to_tokens("\n\n".join(summaries), token_budget), stats
+
+def generate_prompt(username, analysis_type, custom_query="", token_budget=PROMPT_TOKEN_BUDGET):
+    """Generate tailored prompts for Groq's LLaMA model."""
+    behavior = analyze_behavior(username)
+    if not behavior:
+        return "No data available for analysis."
+
+    # Base context
+    context = f"""
+    Analyze Instagram account @{username} with:
+    - {behavior['profile']['followers']} followers
+    - Category: {behavior['profile']['category']}
+    - Avg. likes: {behavior['engagement']['avg_likes']:,.0f}
+    - Verified: {behavior['profile']['is_verified']}
+    """
+
+    # Never let content push prompt plus completion past the model context
+    content_budget = min(
+        token_budget,
+        MODEL_CONTEXT_TOKENS - COMPLETION_MAX_TOKENS - count_tokens(context) - 300  # 300 for instructions
+    )
+
+    # Initialize Groq client
+    groq_client = get_groq_client()
+    if not groq_client:
+        return "AI analysis unavailable - please configure API key"
+
+    all_posts = behavior['engagement']['all_posts']
+    content, content_stats = build_post_context(all_posts, content_budget)
+    content_label = "Post content (ranked by engagement)"
+
+    # Too much content for one prompt: summarize every post in chunks instead
+    if content_stats['posts_included'] < content_stats['posts_available']:
+        try:
+            content, summary_stats = summarize_posts(groq_client, all_posts, content_budget)
+        except Exception as e:
+            return f"❌ Analysis failed: {str(e)}"
+        content_label = "Summary of all posts and comments"
+        content_stats.update(
+            summary_stats,
+            content_tokens=count_tokens(content),
+            posts_included=len(all_posts)
+        )
+
+    if content:
+        context += f"""
+    {content_label}:
+    {content}
+    """
+
+    # Type-specific prompts
+    prompts = {
+        "Content Strategy": f"""
+        {context}
+        Provide detailed content strategy recommendations focusing on:
+        1. Content themes that resonate with current audience
+        2. Optimal posting frequency based on engagement patterns
+        3. Caption strategies that drive engagement
+        4. Visual content improvements
+        """,
+        
+        "Engagement Patterns": f"""
+        {context}
+        Analyze engagement patterns considering:
+        1. Best performing content types
         2. Ideal posting times
         3. Engagement rate trends
         4. Follower growth correlation
@@ -685,22 +1744,29 @@ def generate_prompt(username, analysis_type, custom_query=""):
     {custom_query}
     """)
 
-    # Initialize Groq client
-    groq_client = get_groq_client()
-    if not groq_client:
-        return "AI analysis unavailable - please configure API key"
+    system_message = "You are a professional social media analyst."
+    prompt_usage = dict(content_stats, prompt_tokens=count_tokens(system_message) + count_tokens(prompt))
 
     try:
-        response = groq_client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": "You are a professional social media analyst."},
-                {"role": "user", "content": prompt}
-            ],
-            model="llama3-70b-8192",
-            temperature=0.7,
-            max_tokens=1024,
-            top_p=1
-        )
+        with metrics.timer("groq_completion"):
+            response = groq_client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                model=MODEL_NAME,
+                temperature=0.7,
+                max_tokens=COMPLETION_MAX_TOKENS,
+                top_p=1
+            )
+
+        # Prefer the billed token counts reported by the API over local estimates
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            prompt_usage["prompt_tokens"] = getattr(usage, "prompt_tokens", prompt_usage["prompt_tokens"])
+            prompt_usage["completion_tokens"] = getattr(usage, "completion_tokens", 0)
+        record_token_usage("analysis", prompt_usage["prompt_tokens"], prompt_usage.get("completion_tokens", 0))
+        st.session_state["prompt_usage"] = prompt_usage
         
         return format_analysis_response(
             analysis_type,
@@ -748,11 +1814,14 @@ def batch_scrape_usernames(usernames_input, rate_limit):
             # Save to MongoDB if successful
             if not isinstance(user_info, str) and "Error" not in user_info and save_to_mongo(user_info, images):
                 successful.append(username)
+                metrics.inc("socialscan_batch_profiles_total", result="success")
             else:
                 error_msg = user_info if isinstance(user_info, str) else user_info.get("Error", "Unknown error")
                 failed.append((username, error_msg))
+                metrics.inc("socialscan_batch_profiles_total", result="failed")
         except Exception as e:
             failed.append((username, str(e)))
+            metrics.inc("socialscan_batch_profiles_total", result="failed")
         
         # Update progress
         progress_bar.progress((i + 1) / len(usernames))
@@ -762,6 +1831,1100 @@ def batch_scrape_usernames(usernames_input, rate_limit):
 
     return successful, failed
 
+# ===================== EVIDENCE REPORTS =====================
+REPORT_CACHE_DIR = os.getenv("SOCIALSCAN_REPORT_CACHE", "report_cache")
+REPORT_VERSION = 1                # Bump when the report layout changes to invalidate cached PDFs
+REPORT_THUMBNAIL_SIZE = (360, 360)
+REPORT_WORKERS = os.cpu_count() or 4
+REPORT_POOL_MIN = 8               # Smaller batches render in-process; worker startup costs more than they take
+REPORT_MAX_POSTS = 60             # Newest posts (and thumbnails) shown per report
+
+@st.cache_resource
+def get_report_pool(workers):
+    """Process pool for rendering reports, kept warm across reruns so workers start only once."""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def cached_thumbnail(url):
+    """
+    Download url once and keep a JPEG thumbnail of it on disk for reports.
+
+    Returns:
+        str: path of the thumbnail, or None if the image could not be fetched
+    """
+    if not url or url == "N/A":
+        return None
+    path = os.path.join(REPORT_CACHE_DIR, "thumbnails", f"{hashlib.sha256(url.encode()).hexdigest()}.jpg")
+    if os.path.exists(path):
+        record_cache_lookup("report_thumbnail", True)
+        return path
+    record_cache_lookup("report_thumbnail", False)
+
+    try:
+        image = Image.open(BytesIO(fetch_image_bytes(url))).convert("RGB")
+        image.thumbnail(REPORT_THUMBNAIL_SIZE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        image.save(tmp_path, "JPEG", quality=80)
+        os.replace(tmp_path, path)
+        return path
+    except Exception:
+        return None
+
+def build_report_data(username, analysis=None):
+    """
+    Collect everything an evidence report shows for username from MongoDB.
+
+    Only the newest REPORT_MAX_POSTS posts are included. Thumbnails are left as
+    URLs; render_reports swaps them for cached files.
+
+    Returns:
+        dict: report data, or None if the user is not saved
+    """
+    with metrics.timer("mongo_read"):
+        user_data = collection.find_one({"user_info.Username": username})
+        if not user_data:
+            return None
+        images = load_user_posts(user_data, with_comments=True)
+
+    user_info = user_data.get("user_info", {})
+    captures = []
+    if evidence_captures is not None:
+        latest = evidence_captures.find_one({"kind": "profile", "username": username}, sort=[("captured_at", -1)])
+        if latest:
+            captures = list(evidence_captures.find(
+                {"scrape_id": latest["scrape_id"]},
+                {"_id": 0, "captured_at": 1, "kind": 1, "post_id": 1, "sha256": 1},
+                sort=[("captured_at", 1)]
+            ))
+
+    return {
+        "username": username,
+        "captured_at": user_data.get("timestamp"),
+        "profile": {k: ", ".join(v) if isinstance(v, list) else v for k, v in user_info.items()},
+        "profile_thumbnail": user_info.get("Profile Image"),
+        "bot_score": user_data.get("bot_score"),
+        "bot_reasons": user_data.get("bot_reasons"),
+        "analysis": analysis,
+        "posts": [{
+            "id": image.get("ID"),
+            "likes": image.get("Likes"),
+            "caption": image.get("Caption"),
+            "timestamp": image.get("Timestamp"),
+            "comment_count": image.get("Comment Count", len(image.get("Comments", []))),
+            "thumbnail": image.get("Source"),
+        } for image in images],
+        "captures": captures,
+    }
+
+def _report_path(report):
+    """Cache path of the PDF for report; any change to the report data gives a new path."""
+    key = hashlib.sha256(
+        json.dumps([REPORT_VERSION, report], sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return os.path.join(REPORT_CACHE_DIR, "pdf", f"{report['username']}_{key[:16]}.pdf")
+
+def render_reports(usernames, analyses=None, workers=REPORT_WORKERS):
+    """
+    Render PDF evidence reports for many profiles.
+
+    Thumbnails are downloaded concurrently into the on-disk cache, then reports that
+    are not already cached are rendered in a process pool.
+
+    Args:
+        usernames: Saved usernames to report on
+        analyses: Optional {username: analysis markdown} to include
+        workers: Rendering processes
+
+    Returns:
+        tuple: ({username: pdf path}, list of (username, error))
+    """
+    if not report_renderer.REPORTLAB_AVAILABLE:
+        raise RuntimeError("PDF reports require reportlab (pip install reportlab)")
+
+    analyses = analyses or {}
+    reports = []
+    failed = []
+    for username in dict.fromkeys(usernames):
+        data = build_report_data(username, analyses.get(username))
+        if data is None:
+            failed.append((username, "User not found"))
+        else:
+            reports.append(data)
+
+    # Downloads are I/O bound, so a thread pool fills the thumbnail cache for every report at once
+    urls = {r["profile_thumbnail"] for r in reports} | {p["thumbnail"] for r in reports for p in r["posts"]}
+    with ThreadPoolExecutor(max_workers=IMAGE_FETCH_WORKERS) as executor:
+        thumbnails = dict(zip(urls, executor.map(cached_thumbnail, urls)))
+    for r in reports:
+        r["profile_thumbnail"] = thumbnails.get(r["profile_thumbnail"])
+        for post in r["posts"]:
+            post["thumbnail"] = thumbnails.get(post["thumbnail"])
+
+    paths = {}
+    pending = {}
+    for r in reports:
+        path = _report_path(r)
+        record_cache_lookup("report_pdf", os.path.exists(path))
+        if os.path.exists(path):
+            paths[r["username"]] = path
+        else:
+            pending[r["username"]] = (r, path)
+    if not pending:
+        return paths, failed
+
+    os.makedirs(os.path.join(REPORT_CACHE_DIR, "pdf"), exist_ok=True)
+    with metrics.timer("report_render"):
+        if len(pending) < REPORT_POOL_MIN or workers <= 1:
+            for username, (r, path) in pending.items():
+                try:
+                    paths[username] = report_renderer.render_report_pdf(r, path)
+                except Exception as e:
+                    failed.append((username, str(e)))
+        else:
+            pool = get_report_pool(workers)
+            futures = {
+                pool.submit(report_renderer.render_report_pdf, r, path): username
+                for username, (r, path) in pending.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    paths[futures[future]] = future.result()
+                except BrokenProcessPool as e:
+                    # A crashed worker breaks the whole pool; start a fresh one next time
+                    get_report_pool.clear()
+                    failed.append((futures[future], str(e)))
+                except Exception as e:
+                    failed.append((futures[future], str(e)))
+
+    return paths, failed
+
+def zip_reports(paths):
+    """Bundle {username: pdf path} into one zip archive and return its bytes."""
+    buffer = BytesIO()
+    # PDFs are already compressed, so store them as-is
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for username, path in sorted(paths.items()):
+            archive.write(path, f"{username}_report.pdf")
+    return buffer.getvalue()
+
+# ===================== SCRAPE WORKERS =====================
+LEASE_SECONDS = 120               # A claim not renewed for this long is reclaimed from its worker
+MAX_SCRAPE_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 60        # Wait before a failed username is retried, doubling with each attempt
+WORKER_POLL_INTERVAL = 5          # Seconds an idle worker waits before polling the queue again
+RATE_LIMIT_REQUESTS = int(os.getenv("SOCIALSCAN_RATE_LIMIT", "60"))   # Instagram requests per window, all workers combined
+RATE_LIMIT_WINDOW = 60            # Seconds
+
+def enqueue_usernames(usernames):
+    """
+    Add usernames to the shared scrape queue (re-queuing ones already done or failed).
+
+    Returns:
+        int: number of usernames queued
+    """
+    usernames = list(dict.fromkeys(u.strip() for u in usernames if u.strip()))
+    if not usernames:
+        return 0
+    ensure_indexes(db.name)
+    now = time.time()
+    scrape_queue.bulk_write([
+        UpdateOne(
+            {"_id": username},
+            {"$set": {"state": "pending", "attempts": 0, "enqueued_at": now, "error": None},
+             "$unset": {"not_before": ""}},
+            upsert=True
+        )
+        for username in usernames
+    ], ordered=False)
+    return len(usernames)
+
+def queue_status():
+    """Number of queued usernames in each state."""
+    counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+    for row in scrape_queue.aggregate([{"$group": {"_id": "$state", "count": {"$sum": 1}}}]):
+        counts[row["_id"]] = row["count"]
+    return counts
+
+def claim_next_username(worker_id):
+    """
+    Atomically lease the oldest pending username, or one whose lease has expired.
+
+    Pending usernames that failed before wait out their retry backoff. Expired leases belong
+    to workers that died or stalled, so their usernames are reclaimed; one that expired on
+    its last attempt is marked failed instead.
+
+    Returns:
+        dict: the claimed queue entry, or None if nothing is available
+    """
+    from pymongo import ReturnDocument
+
+    now = time.time()
+    scrape_queue.update_many(
+        {"state": "leased", "lease_expires": {"$lt": now}, "attempts": {"$gte": MAX_SCRAPE_ATTEMPTS}},
+        {"$set": {"state": "failed", "error": "Lease expired on the last attempt", "finished_at": now},
+         "$unset": {"lease_owner": "", "lease_expires": ""}}
+    )
+    entry = scrape_queue.find_one_and_update(
+        {
+            "$or": [
+                {"state": "pending", "not_before": {"$not": {"$gt": now}}},
+                {"state": "leased", "lease_expires": {"$lt": now}},
+            ],
+            "attempts": {"$lt": MAX_SCRAPE_ATTEMPTS},
+        },
+        {
+            "$set": {"state": "leased", "lease_owner": worker_id, "lease_expires": now + LEASE_SECONDS},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("enqueued_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+    if entry is not None and entry["attempts"] > 1:
+        metrics.inc("socialscan_queue_reclaims_total")
+    return entry
+
+def renew_lease(username, worker_id):
+    """Extend a held lease; returns False if the lease was lost to another worker."""
+    result = scrape_queue.update_one(
+        {"_id": username, "state": "leased", "lease_owner": worker_id},
+        {"$set": {"lease_expires": time.time() + LEASE_SECONDS}}
+    )
+    return result.matched_count > 0
+
+def finish_claim(entry, worker_id, error=None, permanent=False):
+    """
+    Mark a claimed username done, or return it to the queue after a retry backoff.
+
+    It fails for good after MAX_SCRAPE_ATTEMPTS, or at once if the error is permanent.
+    """
+    now = time.time()
+    changes = {"error": error, "finished_at": now}
+    if error is None:
+        changes["state"] = "done"
+    elif permanent or entry["attempts"] >= MAX_SCRAPE_ATTEMPTS:
+        changes["state"] = "failed"
+    else:
+        changes["state"] = "pending"
+        changes["not_before"] = now + RETRY_BACKOFF_SECONDS * 2 ** (entry["attempts"] - 1)
+    scrape_queue.update_one(
+        {"_id": entry["_id"], "state": "leased", "lease_owner": worker_id},
+        {"$set": changes, "$unset": {"lease_owner": "", "lease_expires": ""}}
+    )
+
+def ensure_rate_tokens():
+    """Create exactly RATE_LIMIT_REQUESTS token documents shared by every worker."""
+    rate_tokens.bulk_write([
+        UpdateOne({"_id": i}, {"$setOnInsert": {"available_at": 0}}, upsert=True)
+        for i in range(RATE_LIMIT_REQUESTS)
+    ], ordered=False)
+    rate_tokens.delete_many({"_id": {"$gte": RATE_LIMIT_REQUESTS}})
+
+def acquire_rate_token(worker_id):
+    """
+    Block until this worker holds one of the shared request tokens.
+
+    Each token is leased for RATE_LIMIT_WINDOW seconds, which caps all workers together at
+    RATE_LIMIT_REQUESTS requests per window. A token held by a dead worker simply expires.
+    Worker hosts are assumed to have synchronized clocks.
+    """
+    with metrics.timer("rate_limit_wait"):
+        while True:
+            now = time.time()
+            token = rate_tokens.find_one_and_update(
+                {"available_at": {"$lte": now}},
+                {"$set": {"available_at": now + RATE_LIMIT_WINDOW, "holder": worker_id}},
+                sort=[("available_at", 1)]
+            )
+            if token is not None:
+                return
+
+            # Sleep until the next token frees up, staggered so workers do not stampede
+            soonest = rate_tokens.find_one({}, {"available_at": 1}, sort=[("available_at", 1)])
+            wait = (soonest["available_at"] - now) if soonest else 1
+            time.sleep(min(max(wait, 0.05), RATE_LIMIT_WINDOW) + random.uniform(0, 0.05))
+
+def run_worker(worker_id=None, session_ids=None, exit_when_idle=False):
+    """
+    Claim usernames from the shared queue and scrape them until stopped.
+
+    Each profile is scraped with the next session in session_ids, and every Instagram
+    request first takes a token from the global rate limit.
+
+    Returns:
+        int: number of profiles scraped successfully
+    """
+    global request_gate
+
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    sessions = [make_instagram_client(session_id) for session_id in (session_ids or INSTAGRAM_SESSION_IDS)]
+    ensure_indexes(db.name)
+    ensure_rate_tokens()
+    request_gate = lambda: acquire_rate_token(worker_id)
+
+    scraped = 0
+    next_session = 0
+    while True:
+        entry = claim_next_username(worker_id)
+        if entry is None:
+            if exit_when_idle:
+                return scraped
+            time.sleep(WORKER_POLL_INTERVAL)
+            continue
+
+        # Keep the lease alive while the scrape runs
+        stop_renewing = threading.Event()
+        def renew_loop():
+            while not stop_renewing.wait(LEASE_SECONDS / 3):
+                if not renew_lease(entry["_id"], worker_id):
+                    return
+        threading.Thread(target=renew_loop, daemon=True).start()
+
+        permanent = False
+        try:
+            user_info, images = scrape_user(entry["_id"], http_client=sessions[next_session % len(sessions)])
+            next_session += 1
+            if "Error" in user_info:
+                error = user_info["Error"]
+                # A 4xx other than rate limiting (missing or blocked account) will not change on retry
+                status = user_info.get("Status Code", 0)
+                permanent = 400 <= status < 500 and status != 429
+            elif save_to_mongo(user_info, images):
+                error = None
+            else:
+                error = "Failed to save to MongoDB"
+        except Exception as e:
+            error = str(e)
+        finally:
+            stop_renewing.set()
+
+        finish_claim(entry, worker_id, error, permanent)
+        metrics.inc("socialscan_worker_profiles_total", result="failed" if error else "success")
+        if error is None:
+            scraped += 1
+        print(f"[{worker_id}] {entry['_id']}: {error or 'ok'}", flush=True)
+
+def run_workers(processes, session_ids=None, exit_when_idle=False):
+    """Run scrape workers in separate processes, splitting the session pool between them."""
+    session_ids = session_ids or INSTAGRAM_SESSION_IDS
+    if processes <= 1:
+        return run_worker(session_ids=session_ids, exit_when_idle=exit_when_idle)
+
+    context = multiprocessing.get_context("spawn")
+    workers = []
+    for i in range(processes):
+        # Give each process its own slice of sessions when there are enough to go around
+        share = session_ids[i::processes] if len(session_ids) >= processes else session_ids
+        worker = context.Process(
+            target=run_worker,
+            kwargs={"session_ids": share, "exit_when_idle": exit_when_idle}
+        )
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+
+# ===================== WATCHLIST =====================
+WATCH_DEFAULT_INTERVAL = 3600     # Seconds between polls of a newly watched account
+WATCH_MIN_INTERVAL = 900
+WATCH_MAX_INTERVAL = 86400
+WATCH_SPEEDUP = 0.5               # Interval multiplier after a poll that found changes
+WATCH_SLOWDOWN = 1.5              # Interval multiplier after a quiet poll
+WATCH_LEASE_SECONDS = 300         # Keeps a polled entry away from other watchers while it is handled
+WATCH_REQUEST_BUDGET = 200        # Instagram requests per cycle
+WATCH_CYCLE_SECONDS = 600
+FOLLOWER_JUMP_RATIO = 0.05        # Follower changes smaller than this fraction are not events
+FOLLOWER_JUMP_MIN = 100
+WATCH_PROFILE_FIELDS = {          # Snapshot field -> event type when it changes
+    "biography": "bio_changed",
+    "full_name": "profile_changed",
+    "homepage": "profile_changed",
+    "category": "profile_changed",
+    "is_private": "privacy_changed",
+    "is_verified": "profile_changed",
+}
+WATCH_SCRAPE_EVENTS = {"new_posts", "posts_removed", "bio_changed", "profile_changed", "privacy_changed"}
+
+def add_to_watchlist(usernames, interval=WATCH_DEFAULT_INTERVAL):
+    """
+    Watch usernames, polling each for the first time on the next cycle.
+
+    Returns:
+        int: number of usernames newly added
+    """
+    usernames = list(dict.fromkeys(u.strip().lstrip("@") for u in usernames if u.strip()))
+    if not usernames:
+        return 0
+    ensure_indexes(db.name)
+    now = time.time()
+    result = watchlist.bulk_write([
+        UpdateOne(
+            {"_id": username},
+            {"$setOnInsert": {"added_at": now, "interval": interval, "next_poll_at": now, "polls": 0, "changes": 0}},
+            upsert=True
+        )
+        for username in usernames
+    ], ordered=False)
+    return result.upserted_count
+
+def remove_from_watchlist(usernames):
+    """Stop watching usernames; their recorded events are kept."""
+    return watchlist.delete_many({"_id": {"$in": list(usernames)}}).deleted_count
+
+def profile_snapshot(user, posts):
+    """The fields of a profile compared between polls."""
+    def count(value):
+        try:
+            return int(str(value).replace(",", ""))
+        except ValueError:
+            return None
+
+    dated = [p for p in posts if p.get("Timestamp")]
+    newest = max(dated, key=lambda p: p["Timestamp"]) if dated else None
+    return {
+        "followers": count(user.get("Followers")),
+        "following": count(user.get("Following")),
+        "media_count": count(user.get("Image Count")),
+        "biography": user.get("Biography"),
+        "full_name": user.get("Full Name"),
+        "homepage": user.get("Homepage"),
+        "category": user.get("Category"),
+        "is_private": user.get("Is Private"),
+        "is_verified": user.get("Is Verified"),
+        "newest_post_id": newest["ID"] if newest else None,
+        "newest_post_at": newest["Timestamp"] if newest else None,
+    }
+
+def diff_snapshots(before, after, posts):
+    """
+    Changes between two snapshots of a profile.
+
+    Returns:
+        list: (event type, details) pairs
+    """
+    if before is None:
+        return []
+    events = []
+
+    # Pinned posts come first in the feed, so new posts are found by timestamp, not position
+    if after["newest_post_at"] and after["newest_post_at"] > (before.get("newest_post_at") or 0):
+        new_ids = [p["ID"] for p in posts if p.get("Timestamp") and p["Timestamp"] > (before.get("newest_post_at") or 0)]
+        events.append(("new_posts", {"post_ids": new_ids, "media_count": [before.get("media_count"), after["media_count"]]}))
+    elif (after["media_count"] or 0) < (before.get("media_count") or 0):
+        events.append(("posts_removed", {"media_count": [before["media_count"], after["media_count"]]}))
+
+    for field, event_type in WATCH_PROFILE_FIELDS.items():
+        if before.get(field) != after[field]:
+            events.append((event_type, {"field": field, "before": before.get(field), "after": after[field]}))
+
+    for field in ["followers", "following"]:
+        old, new = before.get(field), after[field]
+        if old is not None and new is not None and abs(new - old) >= max(FOLLOWER_JUMP_MIN, FOLLOWER_JUMP_RATIO * old):
+            events.append((f"{field}_jump", {"before": old, "after": new, "delta": new - old}))
+
+    return events
+
+def record_watch_events(username, events, detected_at):
+    """Store change events and count them by type."""
+    if not events:
+        return
+    watch_events.insert_many([
+        {"username": username, "type": event_type, "detected_at": detected_at, "details": details}
+        for event_type, details in events
+    ])
+    for event_type, _ in events:
+        metrics.inc("socialscan_watch_events_total", type=event_type)
+
+def claim_due_watch(budget=None):
+    """
+    Atomically take the most overdue watchlist entry, or None if nothing is due.
+
+    Deferred scrapes costing more than budget are passed over and stay at the front of the queue.
+    """
+    now = time.time()
+    query = {"next_poll_at": {"$lte": now}}
+    if budget is not None:
+        query["$or"] = [{"pending_scrape": {"$ne": True}}, {"scrape_cost": {"$lte": budget}}]
+    return watchlist.find_one_and_update(
+        query,
+        {"$set": {"next_poll_at": now + WATCH_LEASE_SECONDS}},
+        sort=[("next_poll_at", 1)]
+    )
+
+def poll_watched(entry, budget):
+    """
+    Poll one watched account and run a full scrape only if it changed.
+
+    The poll is the single web_profile_info request, which carries the profile counters
+    and the latest posts. A full scrape reuses that response and adds only the comment
+    requests. A scrape that does not fit in budget is deferred to the front of the next cycle;
+    one that fails stays pending and is retried at the next scheduled poll.
+
+    Args:
+        entry: Claimed watchlist document
+        budget: Requests left in this cycle (None for no limit)
+
+    Returns:
+        int: Instagram requests spent (0 if entry could not be handled within budget)
+    """
+    username = entry["_id"]
+    now = time.time()
+    interval = entry.get("interval", WATCH_DEFAULT_INTERVAL)
+    update = {"last_poll_at": now, "last_error": None, "pending_scrape": False}
+    spent = 0
+    response = None
+
+    if entry.get("pending_scrape"):
+        # Changes were found last cycle; the scrape fetches the profile itself
+        if budget is not None and entry.get("scrape_cost", 1) > budget:
+            watchlist.update_one({"_id": username}, {"$set": {"next_poll_at": 0}})
+            return 0
+        events = []
+        needs_scrape = True
+        scrape_cost = entry.get("scrape_cost", 1)
+    else:
+        response = instagram_get(
+            f"{INSTAGRAM_API_BASE}/api/v1/users/web_profile_info/?username={username}",
+            "watch_poll"
+        )
+        spent = 1
+        user, nodes = parse_profile_response(response.json()) if response.status_code == 200 else (
+            {"Error": f"Status code {response.status_code}"}, []
+        )
+        if "Error" in user:
+            # Report an account going unavailable once, not on every poll
+            if not entry.get("last_error"):
+                record_watch_events(username, [("poll_failed", {"error": user["Error"]})], now)
+            watchlist.update_one({"_id": username}, {
+                "$set": {
+                    "last_poll_at": now, "last_error": user["Error"],
+                    "interval": min(WATCH_MAX_INTERVAL, interval * WATCH_SLOWDOWN),
+                    "next_poll_at": now + min(WATCH_MAX_INTERVAL, interval * WATCH_SLOWDOWN),
+                },
+                "$inc": {"polls": 1},
+            })
+            metrics.inc("socialscan_watch_polls_total", result="failed")
+            return spent
+
+        posts = [parse_post_node(node, []) for node in nodes]
+        snapshot = profile_snapshot(user, posts)
+        events = diff_snapshots(entry.get("snapshot"), snapshot, posts)
+        record_watch_events(username, events, now)
+        update["snapshot"] = snapshot
+
+        # A first poll of an account never saved before gets a baseline scrape
+        needs_scrape = any(event_type in WATCH_SCRAPE_EVENTS for event_type, _ in events) or (
+            entry.get("snapshot") is None and collection.count_documents({"user_info.Username": username}, limit=1) == 0
+        )
+        scrape_cost = sum(post_has_comments(node) for node in nodes)
+        metrics.inc("socialscan_watch_polls_total", result="changed" if events else "unchanged")
+
+    if needs_scrape and budget is not None and spent + scrape_cost > budget:
+        # Profile request plus comments, since the reused response will be stale by then
+        update.update({"pending_scrape": True, "scrape_cost": 1 + scrape_cost, "next_poll_at": 0})
+    elif needs_scrape:
+        user_info, images = scrape_user(username, profile_response=response)
+        spent += scrape_cost
+        if "Error" not in user_info and save_to_mongo(user_info, images):
+            update["snapshot"] = profile_snapshot(user_info, images)
+            update["last_scrape_at"] = now
+            metrics.inc("socialscan_watch_scrapes_total")
+        else:
+            # Keep the changes owed a scrape; a deferred scrape's cost already counts the profile request
+            update["last_error"] = user_info.get("Error", "Failed to save to MongoDB")
+            update["pending_scrape"] = True
+            update["scrape_cost"] = scrape_cost if entry.get("pending_scrape") else 1 + scrape_cost
+
+    # Poll active accounts more often and quiet ones less; a deferred scrape already adjusted it
+    if not entry.get("pending_scrape"):
+        interval = max(WATCH_MIN_INTERVAL, interval * WATCH_SPEEDUP) if events else \
+            min(WATCH_MAX_INTERVAL, interval * WATCH_SLOWDOWN)
+        update["interval"] = interval
+    update.setdefault("next_poll_at", now + interval * random.uniform(0.9, 1.1))
+    if events:
+        update["last_change_at"] = now
+
+    watchlist.update_one({"_id": username}, {"$set": update, "$inc": {"polls": 1, "changes": len(events)}})
+    return spent
+
+def run_watchlist_cycle(request_budget=WATCH_REQUEST_BUDGET):
+    """
+    Poll due watchlist entries, most overdue first, until request_budget is spent.
+
+    Returns:
+        dict: polled accounts, requests spent and events recorded in this cycle
+    """
+    ensure_indexes(db.name)
+    started = time.time()
+    remaining = request_budget
+    polled = 0
+    while remaining > 0:
+        # Scrapes that no longer fit are skipped so the rest of the budget still goes to cheap polls
+        entry = claim_due_watch(remaining if polled else None)
+        if entry is None:
+            break
+        try:
+            spent = poll_watched(entry, remaining)
+            if spent == 0:
+                # Only a scrape bigger than the whole budget gets here; it would otherwise hold up the watchlist forever
+                spent = poll_watched(entry, None)
+        except Exception as e:
+            # The entry stays leased and is retried once WATCH_LEASE_SECONDS pass
+            watchlist.update_one({"_id": entry["_id"]}, {"$set": {"last_error": str(e)}})
+            metrics.inc("socialscan_watch_polls_total", result="failed")
+            spent = 1
+        remaining -= spent
+        polled += 1
+
+    return {
+        "polled": polled,
+        "requests": request_budget - remaining,
+        "events": watch_events.count_documents({"detected_at": {"$gte": started}}),
+        "due": watchlist.count_documents({"next_poll_at": {"$lte": time.time()}}),
+    }
+
+def run_watch_loop(request_budget=WATCH_REQUEST_BUDGET, cycle_seconds=WATCH_CYCLE_SECONDS):
+    """Run a watchlist cycle every cycle_seconds, sharing the global rate limit with scrape workers."""
+    global request_gate
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:watch"
+    ensure_indexes(db.name)
+    ensure_rate_tokens()
+    request_gate = lambda: acquire_rate_token(worker_id)
+    while True:
+        start = time.time()
+        summary = run_watchlist_cycle(request_budget)
+        print(
+            f"[{datetime.now():%Y-%m-%d %H:%M:%S}] polled {summary['polled']}, "
+            f"{summary['requests']} requests, {summary['events']} events, {summary['due']} still due",
+            flush=True
+        )
+        time.sleep(max(0, cycle_seconds - (time.time() - start)))
+
+# ===================== FEATURE ENGINE =====================
+FEATURE_CACHE_DIR = "feature_cache"
+FEATURE_VERSION = 1               # Bump when feature definitions change to invalidate the cache
+
+PROFILE_COLUMNS = [
+    "profile_id", "username", "full_name", "biography", "category",
+    "followers", "following", "image_count", "is_private", "is_verified", "scraped_at",
+]
+POST_COLUMNS = ["profile_id", "post_id", "likes", "caption", "timestamp", "comment_count"]
+
+# Column patterns of the three post layouts found in dataset1_train.csv-style exports,
+# in order of preference when a post appears in more than one
+CSV_POST_PATTERNS = [
+    (r"^images\[(\d+)\]\.(ID|Likes|Caption|Timestamp)$", {}),
+    (r"^user_info\.Images\[(\d+)\]\.(ID|Likes|Caption)$", {}),
+    (r"^images\.(image_ids|image_likes|captions)\[(\d+)\]$",
+     {"image_ids": "ID", "image_likes": "Likes", "captions": "Caption"}),
+]
+CSV_POST_FIELDS = {"ID": "post_id", "Likes": "likes", "Caption": "caption", "Timestamp": "timestamp"}
+
+def _to_number(series):
+    """Parse counts such as '6,484,672' or 6484672 into floats (NaN when missing)."""
+    return pd.to_numeric(series.astype(str).str.replace(",", "", regex=False), errors="coerce")
+
+def _to_bool(series):
+    """Parse booleans stored as bools or as 'true'/'false' strings."""
+    return series.astype(str).str.strip().str.lower().isin(["true", "1", "yes"])
+
+def _normalize_frames(profiles, posts):
+    """Coerce raw profile and post frames to the typed columnar schema."""
+    profiles = profiles.reindex(columns=PROFILE_COLUMNS)
+    posts = posts.reindex(columns=POST_COLUMNS)
+
+    for column in ["followers", "following", "image_count", "scraped_at"]:
+        profiles[column] = _to_number(profiles[column])
+    for column in ["is_private", "is_verified"]:
+        profiles[column] = _to_bool(profiles[column])
+    for column in ["username", "full_name", "biography", "category"]:
+        profiles[column] = profiles[column].fillna("").astype(str).replace("N/A", "")
+    profiles["profile_id"] = profiles["profile_id"].astype(str)
+
+    for column in ["likes", "timestamp", "comment_count"]:
+        posts[column] = _to_number(posts[column])
+    posts["caption"] = posts["caption"].fillna("").astype(str).replace("N/A", "")
+    posts["profile_id"] = posts["profile_id"].astype(str)
+    posts["post_id"] = posts["post_id"].astype(str)
+
+    return profiles.drop_duplicates("profile_id", keep="last"), posts
+
+def load_corpus_from_csv(path):
+    """
+    Load profiles and posts from a dataset1_train.csv-style export.
+
+    Returns:
+        tuple: (profiles DataFrame, posts DataFrame) in the typed columnar schema
+    """
+    df = pd.read_csv(path, dtype=str)
+    profile_ids = df.get("user_info.ID", pd.Series(index=df.index, dtype=str)).fillna(df["_id"])
+
+    profiles = pd.DataFrame({
+        "profile_id": profile_ids,
+        "username": df.get("user_info.Username"),
+        "full_name": df.get("user_info.Full Name"),
+        "biography": df.get("user_info.Biography"),
+        "category": df.get("user_info.Category"),
+        "followers": df.get("user_info.Followers"),
+        "following": df.get("user_info.Following"),
+        "image_count": df.get("user_info.Image Count"),
+        "is_private": df.get("user_info.Is Private"),
+        "is_verified": df.get("user_info.Is Verified"),
+        "scraped_at": df.get("timestamp"),
+    })
+
+    # Group post columns by (layout, position) so each group becomes one vectorized slice
+    slices = {}
+    for priority, (pattern, renames) in enumerate(CSV_POST_PATTERNS):
+        for column in df.columns:
+            match = re.match(pattern, column)
+            if not match:
+                continue
+            a, b = match.groups()
+            position, field = (int(a), b) if a.isdigit() else (int(b), renames[a])
+            slices.setdefault((priority, position), {})[CSV_POST_FIELDS[field]] = df[column]
+
+    frames = [
+        pd.DataFrame({"profile_id": profile_ids, "priority": priority, **fields})
+        for (priority, _), fields in slices.items()
+    ]
+    if frames:
+        posts = pd.concat(frames, ignore_index=True).dropna(subset=["post_id"])
+        # First non-null value per field, preferring the earliest layout
+        posts = posts.sort_values("priority").groupby(["profile_id", "post_id"], as_index=False).first()
+    else:
+        posts = pd.DataFrame(columns=POST_COLUMNS)
+
+    return _normalize_frames(profiles, posts)
+
+def load_corpus_from_mongo():
+    """
+    Load profiles and posts from MongoDB without transferring comment text.
+
+    Returns:
+        tuple: (profiles DataFrame, posts DataFrame) in the typed columnar schema
+    """
+    profiles = pd.DataFrame(list(collection.aggregate([
+        {"$project": {
+            "_id": 0,
+            "profile_id": "$user_info.ID",
+            "username": "$user_info.Username",
+            "full_name": "$user_info.Full Name",
+            "biography": "$user_info.Biography",
+            "category": "$user_info.Category",
+            "followers": "$user_info.Followers",
+            "following": "$user_info.Following",
+            "image_count": "$user_info.Image Count",
+            "is_private": "$user_info.Is Private",
+            "is_verified": "$user_info.Is Verified",
+            "scraped_at": "$timestamp",
+        }}
+    ])))
+
+    posts = pd.DataFrame(list(posts_collection.aggregate([
+        {"$project": {
+            "_id": 0,
+            "profile_id": 1,
+            "post_id": "$ID",
+            "likes": "$Likes",
+            "caption": "$Caption",
+            "timestamp": "$Timestamp",
+            "comment_count": "$Comment Count",
+        }}
+    ])))
+
+    # Profiles not yet migrated still embed their posts; let MongoDB flatten them and count comments server-side
+    legacy_posts = pd.DataFrame(list(collection.aggregate([
+        {"$match": {"images": {"$exists": True}}},
+        {"$project": {"user_info.ID": 1, "images": 1}},
+        {"$unwind": "$images"},
+        {"$project": {
+            "_id": 0,
+            "profile_id": "$user_info.ID",
+            "post_id": "$images.ID",
+            "likes": "$images.Likes",
+            "caption": "$images.Caption",
+            "timestamp": "$images.Timestamp",
+            "comment_count": {"$size": {"$ifNull": ["$images.Comments", []]}},
+        }}
+    ])))
+
+    return _normalize_frames(profiles, pd.concat([posts, legacy_posts], ignore_index=True))
+
+def compute_features(profiles, posts):
+    """
+    Compute per-profile features for the whole corpus in vectorized batches.
+
+    Returns:
+        DataFrame: one row per profile, indexed by profile_id
+    """
+    posts = posts.assign(
+        caption_length=posts["caption"].str.len(),
+        hashtag_count=posts["caption"].str.count(r"#\w+"),
+        mention_count=posts["caption"].str.count(r"@[\w.]+"),
+    ).sort_values(["profile_id", "timestamp"])
+
+    # Gap between consecutive posts of the same profile, in hours
+    posts["post_gap_hours"] = posts.groupby("profile_id")["timestamp"].diff() / 3600
+
+    post_stats = posts.groupby("profile_id").agg(
+        post_count=("post_id", "size"),
+        likes_mean=("likes", "mean"),
+        likes_median=("likes", "median"),
+        likes_std=("likes", "std"),
+        likes_min=("likes", "min"),
+        likes_max=("likes", "max"),
+        comments_mean=("comment_count", "mean"),
+        caption_length_mean=("caption_length", "mean"),
+        hashtags_mean=("hashtag_count", "mean"),
+        mentions_mean=("mention_count", "mean"),
+        post_gap_hours_median=("post_gap_hours", "median"),
+        first_post_at=("timestamp", "min"),
+        last_post_at=("timestamp", "max"),
+    )
+
+    features = profiles.set_index("profile_id").join(post_stats, how="left")
+    features["post_count"] = features["post_count"].fillna(0).astype(int)
+
+    followers = features["followers"].where(features["followers"] > 0)
+    following = features["following"].where(features["following"] > 0)
+    features["engagement_per_follower"] = features["likes_mean"] / followers
+    features["likes_cv"] = features["likes_std"] / features["likes_mean"].where(features["likes_mean"] > 0)
+    features["follower_following_ratio"] = features["followers"] / following
+    features["posts_per_week"] = 168 / features["post_gap_hours_median"].where(features["post_gap_hours_median"] > 0)
+    features["biography_length"] = features["biography"].str.len()
+
+    # Where each profile sits in the corpus-wide like-rate distribution
+    features["engagement_percentile"] = features["engagement_per_follower"].rank(pct=True)
+
+    return features.replace([np.inf, -np.inf], np.nan)
+
+def compute_cohort_stats(features):
+    """Summary statistics of key features for verified vs. unverified profiles."""
+    columns = [
+        "followers", "likes_mean", "engagement_per_follower", "likes_cv",
+        "posts_per_week", "caption_length_mean", "hashtags_mean", "mentions_mean",
+    ]
+    stats = features.groupby("is_verified")[columns].agg(["count", "mean", "median"])
+    stats.index = stats.index.map({True: "Verified", False: "Not verified"})
+    return stats
+
+def _feature_source_fingerprint(source):
+    """Identify the current state of a feature source for cache invalidation."""
+    if source:
+        info = os.stat(source)
+        return f"csv:{os.path.abspath(source)}:{info.st_size}:{info.st_mtime_ns}"
+
+    latest = collection.find_one({}, {"timestamp": 1}, sort=[("timestamp", -1)])
+    return f"mongo:{collection.estimated_document_count()}:{latest.get('timestamp') if latest else 0}"
+
+def build_feature_table(source=None, refresh=False):
+    """
+    Load the corpus and compute its feature table, reusing the on-disk cache when the source is unchanged.
+
+    Args:
+        source: Path to a dataset1_train.csv-style file, or None to read MongoDB
+        refresh: Recompute even if a cached table exists
+
+    Returns:
+        DataFrame: feature table indexed by profile_id
+    """
+    fingerprint = _feature_source_fingerprint(source)
+    key = hashlib.sha256(f"{FEATURE_VERSION}:{fingerprint}".encode("utf-8")).hexdigest()[:16]
+
+    # Parquet keeps the table columnar on disk; fall back to pickle without pyarrow
+    use_parquet = importlib.util.find_spec("pyarrow") is not None
+    path = os.path.join(FEATURE_CACHE_DIR, f"features_{key}.{'parquet' if use_parquet else 'pkl'}")
+
+    cached = not refresh and os.path.exists(path)
+    record_cache_lookup("feature_table", cached)
+    if cached:
+        return pd.read_parquet(path) if use_parquet else pd.read_pickle(path)
+
+    with metrics.timer("mongo_read" if source is None else "csv_read"):
+        profiles, posts = load_corpus_from_csv(source) if source else load_corpus_from_mongo()
+    with metrics.timer("feature_compute"):
+        features = compute_features(profiles, posts)
+
+    os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+    if use_parquet:
+        features.to_parquet(path)
+    else:
+        features.to_pickle(path)
+    return features
+
+# ===================== BOT SCORING =====================
+BOT_MODEL_PATH = "bot_model.json"
+BOT_TRAINING_CSV = "dataset1_train.csv"
+BOT_MODEL_VERSION = 3
+BOT_SIGNAL_CAP = 2.0              # Most a single feature contributes, in factors of ten past its reference
+BOT_SCORE_MIDPOINT = 2.5          # Raw score mapped to 0.5
+BOT_SCORE_SPREAD = 0.5
+
+# Feature -> (direction that is suspicious, reference value, weight). Only ratios are used, so a
+# small personal account and a celebrity are judged alike; a feature adds weight for every factor
+# of ten it lies past its reference.
+BOT_FEATURES = {
+    "follower_following_ratio": ("low", 0.2, 1.5),    # Following five times more accounts than follow back
+    "engagement_per_follower": ("low", 0.005, 1.0),   # Likes under 0.5% of followers
+    "hashtags_mean": ("high", 10, 0.75),
+    "posts_per_week": ("high", 35, 0.75),
+}
+
+# Binary traits and their weights
+BOT_TRAITS = {
+    "no_biography": 1.0,
+    "no_full_name": 1.0,
+    "digit_heavy_username": 1.0,
+    "no_posts": 0.5,
+}
+
+_bot_model = None
+
+def _bot_trait_frame(features):
+    """Binary bot-like traits for every profile in a feature table."""
+    return pd.DataFrame({
+        "no_biography": features["biography"].str.strip() == "",
+        "no_full_name": features["full_name"].str.strip() == "",
+        "digit_heavy_username": features["username"].str.count(r"\d") >= 4,
+        "no_posts": features["post_count"] == 0,
+    }, index=features.index).astype(float)
+
+def _bot_raw_scores(features, model):
+    """Weighted sum of how far each feature lies past its reference, plus trait weights."""
+    contributions = {}
+
+    for name, params in model["features"].items():
+        # Factors of ten past the reference; a zero ratio counts as the full cap
+        with np.errstate(divide="ignore"):
+            signal = np.log10(features[name].clip(lower=0) / params["reference"])
+        if params["direction"] == "low":
+            signal = -signal
+        contributions[name] = signal.clip(lower=0, upper=BOT_SIGNAL_CAP).fillna(0) * params["weight"]
+
+    traits = _bot_trait_frame(features)
+    for name, weight in model["traits"].items():
+        contributions[name] = traits[name] * weight
+
+    contributions = pd.DataFrame(contributions, index=features.index)
+    return contributions.sum(axis=1), contributions
+
+def train_bot_model(csv_path=BOT_TRAINING_CSV, model_path=BOT_MODEL_PATH):
+    """
+    Build the bot-scoring model, check it against a dataset1_train.csv-style export and save it as JSON.
+
+    The export is unlabeled and almost entirely verified celebrities, so fitting feature
+    distributions to it would flag every ordinary account. The model is instead a fixed
+    weighting of scale-free ratios and traits (BOT_FEATURES, BOT_TRAITS); the export only
+    records how many of its profiles the model flags. Edit the saved JSON to tune it.
+    """
+    global _bot_model
+    features = compute_features(*load_corpus_from_csv(csv_path))
+
+    model = {
+        "version": BOT_MODEL_VERSION,
+        "features": {
+            name: {"direction": direction, "reference": reference, "weight": weight}
+            for name, (direction, reference, weight) in BOT_FEATURES.items()
+        },
+        "traits": dict(BOT_TRAITS),
+        "threshold": BOT_SCORE_MIDPOINT,
+        "spread": BOT_SCORE_SPREAD,
+    }
+
+    raw, _ = _bot_raw_scores(features, model)
+    model["trained_on"] = {
+        "path": os.path.basename(csv_path),
+        "profiles": int(len(features)),
+        "flagged": int((raw > BOT_SCORE_MIDPOINT).sum()),
+        "timestamp": time.time(),
+    }
+
+    with open(model_path, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2)
+    _bot_model = model
+    return model
+
+def load_bot_model(model_path=BOT_MODEL_PATH):
+    """Load the bot-scoring model, (re)training it from BOT_TRAINING_CSV on first use or after a version change."""
+    global _bot_model
+    if _bot_model is None:
+        if os.path.exists(model_path):
+            with open(model_path, encoding="utf-8") as f:
+                _bot_model = json.load(f)
+            if _bot_model.get("version") != BOT_MODEL_VERSION and os.path.exists(BOT_TRAINING_CSV):
+                _bot_model = None
+        if _bot_model is None and os.path.exists(BOT_TRAINING_CSV):
+            train_bot_model(BOT_TRAINING_CSV, model_path)
+    return _bot_model
+
+def score_feature_table(features, model=None):
+    """
+    Score every profile in a feature table.
+
+    Returns:
+        DataFrame: bot_score in [0, 1] and the top contributing reasons, indexed like features
+    """
+    model = model or load_bot_model()
+    if model is None:
+        raise FileNotFoundError(f"No bot model at {BOT_MODEL_PATH} and no {BOT_TRAINING_CSV} to train one")
+
+    raw, contributions = _bot_raw_scores(features, model)
+    scores = 1 / (1 + np.exp(-(raw - model["threshold"]) / model["spread"]))
+
+    # The three largest non-zero contributions explain each score
+    reasons = contributions.apply(
+        lambda row: [name for name, value in row.nlargest(3).items() if value > 0],
+        axis=1
+    )
+    return pd.DataFrame({"bot_score": scores.round(4), "bot_reasons": reasons}, index=features.index)
+
+def score_profile(user_info, images):
+    """Score one scraped profile, returning (bot_score, reasons)."""
+    profiles = pd.DataFrame([{
+        "profile_id": user_info.get("ID"),
+        "username": user_info.get("Username"),
+        "full_name": user_info.get("Full Name"),
+        "biography": user_info.get("Biography"),
+        "category": user_info.get("Category"),
+        "followers": user_info.get("Followers"),
+        "following": user_info.get("Following"),
+        "image_count": user_info.get("Image Count"),
+        "is_private": user_info.get("Is Private"),
+        "is_verified": user_info.get("Is Verified"),
+    }])
+    posts = pd.DataFrame([{
+        "profile_id": user_info.get("ID"),
+        "post_id": image.get("ID"),
+        "likes": image.get("Likes"),
+        "caption": image.get("Caption"),
+        "timestamp": image.get("Timestamp"),
+        "comment_count": len(image.get("Comments", [])),
+    } for image in images], columns=POST_COLUMNS)
+
+    result = score_feature_table(compute_features(*_normalize_frames(profiles, posts))).iloc[0]
+    return float(result["bot_score"]), result["bot_reasons"]
+
+def score_all_profiles():
+    """
+    Score every profile in MongoDB in one vectorized batch and store the scores.
+
+    Returns:
+        DataFrame: username, bot_score and bot_reasons, most suspicious first
+    """
+    features = build_feature_table()
+    scores = score_feature_table(features)
+    if len(scores):
+        collection.bulk_write([
+            UpdateOne(
+                {"user_info.ID": profile_id},
+                {"$set": {"bot_score": float(row.bot_score), "bot_reasons": row.bot_reasons}}
+            )
+            for profile_id, row in scores.iterrows()
+        ], ordered=False)
+
+    return features[["username"]].join(scores).sort_values("bot_score", ascending=False)
+
 # ===================== STREAMLIT APP =====================
 def main():
     st.title("📊 SocialScan")
@@ -771,7 +2934,7 @@ def main():
     st.sidebar.title("Modules")
     app_mode = st.sidebar.radio(
         "Select Module:",
-        ["Profile Scraper", "Behavioural Analysis"],
+        ["Profile Scraper", "Behavioural Analysis", "Evidence Reports", "Watchlist", "Corpus Features", "Diagnostics"],
         label_visibility="collapsed"
     )
     
@@ -795,16 +2958,39 @@ def main():
                             st.error(user_info["Error"])
                         else:
                             save_to_mongo(user_info, images)
-                            display_user_info(user_info)
-                            display_media_grid(images)
+                            # Keep the result so paging the grid does not rescrape
+                            st.session_state["scraped_profile"] = (username, user_info, images)
+                            st.session_state["scraped_media_page"] = 0
                 else:
                     st.warning("Please enter a username")
+
+            scraped = st.session_state.get("scraped_profile")
+            if scraped and scraped[0] == username:
+                pending = []
+                display_user_info(scraped[1], pending)
+                display_media_grid(scraped[2], key="scraped_media", pending=pending)
+                render_deferred_images(pending)
         
         elif scraper_option == "Batch Scrape":
             st.subheader("Batch Scrape Profiles")
             usernames = st.text_area("Enter usernames (one per line):")
-            rate_limit = st.slider("Delay between requests (seconds):", 1, 10, 3)
-            if st.button("Start Batch Scrape"):
+            distributed = st.checkbox(
+                "Queue for scrape workers",
+                help="Hand the usernames to `python app.py worker` processes instead of scraping here."
+            )
+            if distributed:
+                if scrape_queue is not None and st.button("Add to Queue"):
+                    if usernames:
+                        queued = enqueue_usernames(usernames.split("\n"))
+                        st.success(f"Queued {queued} usernames")
+                    else:
+                        st.warning("Please enter at least one username")
+                if scrape_queue is not None:
+                    status_cols = st.columns(4)
+                    for col, (state, count) in zip(status_cols, queue_status().items()):
+                        col.metric(state.title(), count)
+            rate_limit = st.slider("Delay between requests (seconds):", 1, 10, 3, disabled=distributed)
+            if not distributed and st.button("Start Batch Scrape"):
                 if usernames:
                     successful, failed = batch_scrape_usernames(usernames, rate_limit)
                     st.success(f"Completed: {len(successful)} successful, {len(failed)} failed")
@@ -828,9 +3014,8 @@ def main():
                 if selected:
                     username = selected.split(" (scraped")[0]
                     if st.button("Load Profile"):
-                        user_info, images = load_saved_user(username)
-                        display_user_info(user_info)
-                        display_media_grid(images)
+                        st.session_state["loaded_profile"] = username
+                        st.session_state["saved_media_page"] = 0
                     if st.button("Export to CSV"):
                         success, filename = export_user_data_to_csv(username)
                         if success:
@@ -841,6 +3026,18 @@ def main():
                                     file_name=filename,
                                     mime="text/csv"
                                 )
+
+                    # Rendered last so image downloads never delay the controls above
+                    if st.session_state.get("loaded_profile") == username:
+                        user_info, load_page, total = load_saved_user(username)
+                        pending = []
+                        display_user_info(user_info, pending)
+                        if load_page is not None:
+                            display_media_grid(
+                                None, key="saved_media", pending=pending, profile_id=profile_key(user_info),
+                                load_page=load_page, total=total
+                            )
+                        render_deferred_images(pending)
     
     # AI Analysis Module
     elif app_mode == "Behavioural Analysis":
@@ -882,6 +3079,12 @@ def main():
                 placeholder="What specific insights would you like?",
                 height=100
             )
+
+        token_budget = st.slider(
+            "Post content token budget:",
+            500, MODEL_CONTEXT_TOKENS - COMPLETION_MAX_TOKENS - 1000, PROMPT_TOKEN_BUDGET, step=250,
+            help="Maximum tokens of captions and comments included in the prompt."
+        )
         
         if st.button("Generate Analysis", type="primary"):
             with st.status("Analyzing profile...", expanded=True) as status:
@@ -900,16 +3103,36 @@ def main():
                     metric_cols[1].metric("Following", behavior['profile']['following'])
                     metric_cols[2].metric("Avg Likes", f"{behavior['engagement']['avg_likes']:,.0f}")
                     metric_cols[3].metric("Posts", behavior['engagement']['total_posts'])
+
+                    bot_score = behavior['profile'].get('bot_score')
+                    if bot_score is not None:
+                        st.caption(f"🤖 Bot score: {bot_score:.2f}")
                     
                     # Generate AI analysis
                     st.write("🧠 Processing AI insights...")
+                    st.session_state.pop("prompt_usage", None)
                     analysis_result = generate_prompt(
                         selected_user, 
                         analysis_type,
-                        custom_query
+                        custom_query,
+                        token_budget
                     )
                     
                     status.update(label="Analysis Complete", state="complete")
+
+                    # Report token use of the prompt
+                    usage = st.session_state.get("prompt_usage")
+                    if usage:
+                        st.caption(
+                            f"🧮 Prompt: {usage['prompt_tokens']:,} tokens "
+                            f"({usage['content_tokens']:,}/{usage['token_budget']:,} content budget, "
+                            f"{usage['posts_included']}/{usage['posts_available']} posts, "
+                            f"{usage['comments_included']} comments"
+                            + (f", {usage['chunks']} chunks summarized, {usage['chunk_cache_hits']} cached"
+                               if 'chunks' in usage else "")
+                            + ") · "
+                            f"Completion: {usage.get('completion_tokens', 0):,} tokens"
+                        )
                     
                     # Display results
                     st.markdown("---")
@@ -922,11 +3145,335 @@ def main():
                         file_name=f"{selected_user}{analysis_type.replace(' ', '')}_report.txt",
                         mime="text/plain"
                     )
+
+                    # Kept so a PDF can be rendered on request after the rerun a click triggers
+                    st.session_state["last_analysis"] = {
+                        "username": selected_user, "type": analysis_type, "text": analysis_result, "pdf": None
+                    }
                     
                 except Exception as e:
                     status.update(label="Analysis Failed", state="error")
                     st.error(f"Error during analysis: {e}")
                     st.error(traceback.format_exc())
 
+        # PDF export of the latest analysis of this profile, rendered only when asked for
+        last_analysis = st.session_state.get("last_analysis")
+        if report_renderer.REPORTLAB_AVAILABLE and last_analysis and last_analysis["username"] == selected_user:
+            if last_analysis["pdf"] is None and st.button(f"📄 Create PDF Report ({last_analysis['type']})"):
+                with st.spinner("Rendering PDF..."):
+                    paths, failed = render_reports([selected_user], {selected_user: last_analysis["text"]})
+                for _, error in failed:
+                    st.error(f"Could not render PDF: {error}")
+                last_analysis["pdf"] = paths.get(selected_user)
+            if last_analysis["pdf"]:
+                with open(last_analysis["pdf"], "rb") as f:
+                    st.download_button(
+                        "📄 Download PDF Report",
+                        data=f,
+                        file_name=f"{selected_user}{last_analysis['type'].replace(' ', '')}_report.pdf",
+                        mime="application/pdf"
+                    )
+
+    # Evidence Report Module
+    elif app_mode == "Evidence Reports":
+        st.header("PDF Evidence Reports")
+        if collection is None:
+            st.error("Database connection unavailable")
+            return
+        if not report_renderer.REPORTLAB_AVAILABLE:
+            st.error("PDF reports require reportlab (pip install reportlab)")
+            return
+
+        saved = [username for username, _ in get_saved_usernames()]
+        report_all = st.checkbox("All saved profiles", value=False)
+        selected = saved if report_all else st.multiselect("Profiles:", saved)
+        analysis_type = st.selectbox(
+            "Include AI analysis:",
+            ["None", "Content Strategy", "Engagement Patterns", "Audience Insights", "Competitive Analysis"],
+            help="Runs one Groq request per profile before rendering."
+        )
+
+        if st.button("Generate Reports", type="primary"):
+            if not selected:
+                st.warning("Please select at least one profile")
+                return
+            with st.status(f"Rendering {len(selected)} reports...", expanded=True) as status:
+                analyses = None
+                if analysis_type != "None":
+                    analyses = {}
+                    progress = st.progress(0)
+                    for i, username in enumerate(selected):
+                        st.write(f"🧠 Analyzing @{username}...")
+                        analyses[username] = generate_prompt(username, analysis_type)
+                        progress.progress((i + 1) / len(selected))
+                st.write("📄 Rendering PDFs...")
+                start = time.perf_counter()
+                paths, failed = render_reports(selected, analyses)
+                status.update(
+                    label=f"Rendered {len(paths)} reports in {time.perf_counter() - start:.2f}s",
+                    state="complete" if paths else "error"
+                )
+            for username, error in failed:
+                st.warning(f"{username}: {error}")
+            st.session_state["report_paths"] = paths
+
+        # Keep the downloads across the rerun a download click triggers
+        paths = st.session_state.get("report_paths")
+        if paths:
+            if len(paths) == 1:
+                username, path = next(iter(paths.items()))
+                with open(path, "rb") as f:
+                    st.download_button("📄 Download PDF Report", data=f, file_name=f"{username}_report.pdf", mime="application/pdf")
+            else:
+                st.download_button(
+                    f"📦 Download {len(paths)} Reports (zip)",
+                    data=zip_reports(paths),
+                    file_name=f"socialscan_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                    mime="application/zip"
+                )
+
+    # Watchlist Module
+    elif app_mode == "Watchlist":
+        st.header("Change Watchlist")
+        if watchlist is None:
+            st.error("Database connection unavailable")
+            return
+
+        col1, col2 = st.columns([3, 2])
+        with col1:
+            new_usernames = st.text_area("Usernames to watch (one per line):", height=100)
+            if st.button("Add to Watchlist") and new_usernames:
+                st.success(f"Added {add_to_watchlist(new_usernames.split(chr(10)))} usernames")
+        with col2:
+            budget = st.number_input("Request budget:", 1, 5000, WATCH_REQUEST_BUDGET, step=50)
+            if st.button("Run Poll Cycle Now", type="primary"):
+                with st.spinner("Polling due accounts..."):
+                    summary = run_watchlist_cycle(budget)
+                st.success(
+                    f"Polled {summary['polled']} accounts with {summary['requests']} requests, "
+                    f"{summary['events']} changes found, {summary['due']} still due"
+                )
+            st.caption("Run `python app.py watch` to poll on a schedule.")
+
+        entries = list(watchlist.find({}, {"snapshot": 0}).sort("next_poll_at", 1))
+        st.subheader(f"Watched Accounts ({len(entries)})")
+        if entries:
+            def when(timestamp):
+                return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else "-"
+
+            st.dataframe(pd.DataFrame([{
+                "username": e["_id"],
+                "interval (min)": round(e.get("interval", WATCH_DEFAULT_INTERVAL) / 60),
+                "next poll": "scrape pending" if e.get("pending_scrape") else when(e.get("next_poll_at")),
+                "last poll": when(e.get("last_poll_at")),
+                "last change": when(e.get("last_change_at")),
+                "polls": e.get("polls", 0),
+                "changes": e.get("changes", 0),
+                "error": e.get("last_error") or "",
+            } for e in entries]), use_container_width=True, hide_index=True)
+
+            to_remove = st.multiselect("Stop watching:", [e["_id"] for e in entries])
+            if to_remove and st.button("Remove"):
+                remove_from_watchlist(to_remove)
+                st.rerun()
+
+        st.subheader("Recent Changes")
+        event_filter = st.selectbox("Account:", ["All"] + [e["_id"] for e in entries])
+        query = {} if event_filter == "All" else {"username": event_filter}
+        events = list(watch_events.find(query, {"_id": 0}).sort("detected_at", -1).limit(200))
+        if events:
+            st.dataframe(pd.DataFrame([{
+                "detected": datetime.fromtimestamp(e["detected_at"]).strftime("%Y-%m-%d %H:%M"),
+                "username": e["username"],
+                "change": e["type"].replace("_", " "),
+                "details": json.dumps(e.get("details", {}), default=str),
+            } for e in events]), use_container_width=True, hide_index=True)
+        else:
+            st.info("No changes recorded yet.")
+
+    # Corpus Feature Module
+    elif app_mode == "Corpus Features":
+        st.header("Corpus Feature Table")
+        source = st.radio("Source:", ["MongoDB", "CSV file"], horizontal=True)
+        csv_path = None
+        if source == "CSV file":
+            csv_path = st.text_input("CSV path:", value="dataset1_train.csv")
+        elif collection is None:
+            st.error("Database connection unavailable")
+            return
+        refresh = st.checkbox("Ignore cached features and recompute")
+
+        if st.button("Compute Features", type="primary"):
+            try:
+                start = time.perf_counter()
+                features = build_feature_table(csv_path, refresh=refresh)
+                st.success(f"{len(features)} profiles in {time.perf_counter() - start:.2f}s")
+                st.subheader("Verified vs. Not Verified")
+                st.dataframe(compute_cohort_stats(features), use_container_width=True)
+                st.subheader("Profile Features")
+                st.dataframe(features, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error computing features: {e}")
+
+        st.subheader("Bot Triage")
+        if collection is not None and st.button("Score All Saved Profiles"):
+            try:
+                start = time.perf_counter()
+                scores = score_all_profiles()
+                st.success(f"Scored {len(scores)} profiles in {time.perf_counter() - start:.2f}s")
+                st.dataframe(scores, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error scoring profiles: {e}")
+
+    # Diagnostics Module
+    elif app_mode == "Diagnostics":
+        st.header("Diagnostics")
+        st.button("Refresh")
+        counters, stages = metrics.snapshot()
+
+        st.subheader("Stage Timings")
+        if stages:
+            stage_df = pd.DataFrame.from_dict(stages, orient="index").sort_values("total_s", ascending=False)
+            stage_df["errors"] = [counters.get(("socialscan_stage_errors_total", (("stage", stage),)), 0) for stage in stage_df.index]
+            st.dataframe(stage_df.round(2), use_container_width=True)
+        else:
+            st.info("No stages recorded yet in this process.")
+
+        def counter_total(name, **labels):
+            return sum(
+                value for (counter, counter_labels), value in counters.items()
+                if counter == name and all(dict(counter_labels).get(k) == v for k, v in labels.items())
+            )
+
+        st.subheader("Transfer, Retries and Tokens")
+        metric_cols = st.columns(4)
+        metric_cols[0].metric("Bytes Transferred", f"{counter_total('socialscan_http_bytes_total') / 1e6:,.2f} MB")
+        metric_cols[1].metric("HTTP Retries", f"{counter_total('socialscan_http_retries_total'):,}")
+        metric_cols[2].metric("Prompt Tokens", f"{counter_total('socialscan_llm_tokens_total', kind='prompt'):,}")
+        metric_cols[3].metric("Completion Tokens", f"{counter_total('socialscan_llm_tokens_total', kind='completion'):,}")
+
+        st.subheader("Cache Hit Rates")
+        caches = sorted({dict(labels)["cache"] for name, labels in counters if name == "socialscan_cache_requests_total"})
+        if caches:
+            cache_cols = st.columns(len(caches))
+            for col, cache in zip(cache_cols, caches):
+                hits = counter_total("socialscan_cache_requests_total", cache=cache, result="hit")
+                total = counter_total("socialscan_cache_requests_total", cache=cache)
+                col.metric(cache.replace("_", " ").title(), f"{hits / total:.0%}", f"{total:,} lookups", delta_color="off")
+        else:
+            st.info("No cache lookups recorded yet in this process.")
+
+        with st.expander("Prometheus metrics"):
+            prometheus_text = metrics.render_prometheus()
+            st.code(prometheus_text, language="text")
+            st.download_button("📥 Download metrics", prometheus_text, file_name="socialscan_metrics.prom", mime="text/plain")
+
+def run_cli(argv):
+    """Command-line entry point for batch jobs that run outside the Streamlit UI."""
+    parser = argparse.ArgumentParser(prog="app.py", description="SocialScan batch commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    features_cmd = commands.add_parser("features", help="Recompute the corpus feature table")
+    features_cmd.add_argument("csv", nargs="?", help="dataset1_train.csv-style file (default: MongoDB)")
+
+    train_cmd = commands.add_parser("train-bot-model", help="Build the bot-scoring model and check it on a CSV export")
+    train_cmd.add_argument("csv", nargs="?", default=BOT_TRAINING_CSV, help="Training export")
+
+    commands.add_parser("score-profiles", help="Score every saved profile for bot-like behavior")
+
+    enqueue_cmd = commands.add_parser("enqueue", help="Add usernames to the shared scrape queue")
+    enqueue_cmd.add_argument("file", help="File with one username per line, or - for stdin")
+
+    worker_cmd = commands.add_parser("worker", help="Scrape usernames from the shared queue")
+    worker_cmd.add_argument("--processes", type=int, default=1, help="Worker processes on this host")
+    worker_cmd.add_argument("--exit-when-idle", action="store_true", help="Stop once the queue is empty")
+
+    report_cmd = commands.add_parser("report", help="Render PDF evidence reports for saved profiles")
+    report_cmd.add_argument("usernames", nargs="*", help="Profiles to report on (default: all saved)")
+    report_cmd.add_argument("--output", default="reports.zip", help="Zip file, or a directory to copy the PDFs into")
+    report_cmd.add_argument("--analysis", help="Include an AI analysis of this type, e.g. \"Content Strategy\"")
+    report_cmd.add_argument("--workers", type=int, default=REPORT_WORKERS, help="Rendering processes")
+
+    watch_cmd = commands.add_parser("watch", help="Poll the watchlist for changes on a schedule")
+    watch_cmd.add_argument("--add", metavar="FILE", help="First add the usernames in FILE (one per line) to the watchlist")
+    watch_cmd.add_argument("--budget", type=int, default=WATCH_REQUEST_BUDGET, help="Instagram requests per cycle")
+    watch_cmd.add_argument("--cycle", type=int, default=WATCH_CYCLE_SECONDS, help="Seconds per cycle")
+    watch_cmd.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+
+    commands.add_parser("migrate", help="Move embedded posts and comments into their own collections")
+
+    reparse_cmd = commands.add_parser("reparse", help="Rebuild saved profiles from the evidence archive offline")
+    reparse_cmd.add_argument("usernames", nargs="*", help="Profiles to rebuild (default: all archived)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "features":
+        start = time.perf_counter()
+        features = build_feature_table(args.csv, refresh=True)
+        print(f"Computed features for {len(features)} profiles in {time.perf_counter() - start:.2f}s")
+        print(compute_cohort_stats(features).to_string())
+
+    elif args.command == "train-bot-model":
+        model = train_bot_model(args.csv)
+        print(
+            f"Checked on {model['trained_on']['profiles']} profiles ({model['trained_on']['flagged']} flagged), "
+            f"saved to {BOT_MODEL_PATH}"
+        )
+
+    elif args.command == "score-profiles":
+        start = time.perf_counter()
+        scores = score_all_profiles()
+        print(f"Scored {len(scores)} profiles in {time.perf_counter() - start:.2f}s")
+        print(scores.head(20).to_string())
+
+    elif args.command == "enqueue":
+        with (sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")) as f:
+            queued = enqueue_usernames(f.read().splitlines())
+        print(f"Queued {queued} usernames: {queue_status()}")
+
+    elif args.command == "worker":
+        run_workers(args.processes, exit_when_idle=args.exit_when_idle)
+
+    elif args.command == "report":
+        usernames = args.usernames or [username for username, _ in get_saved_usernames()]
+        analyses = {u: generate_prompt(u, args.analysis) for u in usernames} if args.analysis else None
+        start = time.perf_counter()
+        paths, failed = render_reports(usernames, analyses, args.workers)
+        if args.output.endswith(".zip"):
+            with open(args.output, "wb") as f:
+                f.write(zip_reports(paths))
+        else:
+            os.makedirs(args.output, exist_ok=True)
+            for username, path in paths.items():
+                shutil.copyfile(path, os.path.join(args.output, f"{username}_report.pdf"))
+        print(f"Rendered {len(paths)} reports to {args.output} in {time.perf_counter() - start:.2f}s")
+        for username, error in failed:
+            print(f"{username}: {error}")
+
+    elif args.command == "watch":
+        if args.add:
+            with open(args.add, encoding="utf-8") as f:
+                print(f"Added {add_to_watchlist(f.read().splitlines())} usernames to the watchlist")
+        if args.once:
+            print(run_watchlist_cycle(args.budget))
+        else:
+            run_watch_loop(args.budget, args.cycle)
+
+    elif args.command == "migrate":
+        start = time.perf_counter()
+        migrated = migrate_embedded_posts()
+        print(f"Migrated {migrated} profiles in {time.perf_counter() - start:.2f}s")
+
+    elif args.command == "reparse":
+        start = time.perf_counter()
+        rebuilt, failed = reparse_archive(args.usernames)
+        print(f"Rebuilt {len(rebuilt)} profiles in {time.perf_counter() - start:.2f}s")
+        for username, error in failed:
+            print(f"{username}: {error}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # `streamlit run app.py` starts the UI; `python app.py <command>` runs a batch job
+    if len(sys.argv) > 1:
+        run_cli(sys.argv[1:])
+    else:
+        main()
\ No newline at end of file
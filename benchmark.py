@@ -0,0 +1,477 @@
+"""
+Reproducible performance benchmarks for SocialScan.
+
+Runs scrape_user, batch_scrape_usernames, save_to_mongo, analyze_behavior,
+export_user_data_to_csv and generate_prompt against a local stand-in for the
+Instagram API, the Instagram CDN and Groq, with mongomock (default) or a local mongod.
+
+    python benchmark.py
+    python benchmark.py --latency-ms 80 --error-rate 0.02 --output run.json
+    python benchmark.py --baseline run.json
+
+Recorded responses are replayed from --fixtures DIR when present:
+    DIR/profiles/<username>.json   web_profile_info response body
+    DIR/comments/<post_id>.json    comments response body
+    DIR/image.jpg                  CDN image served for every post
+    DIR/groq.json                  chat completion response body
+Anything not recorded is generated from dataset1_train.csv rows.
+
+mongomock does not accept the bulk writes of pymongo 4.9 and later; with a newer
+pymongo, benchmark against a local mongod with --mongo-uri.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+SCENARIOS = [
+    "scrape_user",
+    "batch_scrape_usernames",
+    "save_to_mongo",
+    "analyze_behavior",
+    "export_user_data_to_csv",
+    "generate_prompt",
+]
+
+COMMENT_WORDS = ["love", "this", "amazing", "wow", "so", "good", "🔥", "❤️", "congrats", "great", "shot", "legend"]
+
+# ===================== SYNTHETIC DATA =====================
+def _count(value):
+    """Parse counts stored as '43,092,968', '6484672' or '3036571.0'."""
+    try:
+        return int(float(str(value).replace(",", "")))
+    except ValueError:
+        return 0
+
+
+class SyntheticProfiles:
+    """Deterministic web_profile_info and comments responses seeded from dataset1_train.csv rows."""
+
+    def __init__(self, csv_path, count, posts, comments, seed):
+        with open(csv_path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.rows = rows
+        self.posts = posts
+        self.comments = comments
+        self.seed = seed
+        self.image_base = ""
+
+        self.usernames = []
+        for i in range(count):
+            row = rows[i % len(rows)]
+            suffix = f"_{i // len(rows)}" if i >= len(rows) else ""
+            self.usernames.append(f"{row['user_info.Username']}{suffix}")
+        self.index = {username: i for i, username in enumerate(self.usernames)}
+        self.profiles = {}
+        self.post_comments = {}
+
+    def _row_posts(self, row):
+        """(likes, caption) pairs from whichever post layout the row uses."""
+        pairs = []
+        for i in range(12):
+            likes = row.get(f"images[{i}].Likes") or row.get(f"user_info.Images[{i}].Likes")
+            caption = row.get(f"images[{i}].Caption") or row.get(f"user_info.Images[{i}].Caption") or ""
+            if likes:
+                pairs.append((_count(likes), caption))
+        return pairs or [(100, "")]
+
+    def profile(self, username):
+        """web_profile_info response body for username, or None if unknown."""
+        if username in self.profiles:
+            return self.profiles[username]
+        if username not in self.index:
+            return None
+
+        i = self.index[username]
+        row = self.rows[i % len(self.rows)]
+        rng = random.Random(self.seed * 1_000_003 + i)
+        seeds = self._row_posts(row)
+        now = 1_750_000_000
+
+        edges = []
+        for n in range(self.posts):
+            likes, caption = seeds[n % len(seeds)]
+            post_id = str(3_000_000_000_000_000_000 + i * 100_000 + (self.posts - n))
+            n_comments = rng.randint(0, self.comments * 2) if self.comments else 0
+            self.post_comments[post_id] = n_comments
+            edges.append({"node": {
+                "id": post_id,
+                "display_url": f"{self.image_base}/cdn/{post_id}.jpg",
+                "taken_at_timestamp": now - n * rng.randint(3_600, 7 * 86_400),
+                "edge_liked_by": {"count": max(0, int(likes * rng.lognormvariate(0, 0.3)))},
+                "edge_media_to_comment": {"count": n_comments},
+                "edge_media_to_caption": {"edges": [{"node": {"text": caption}}]} if caption else {"edges": []},
+            }})
+
+        body = {"data": {"user": {
+            "username": username,
+            "full_name": row.get("user_info.Full Name", ""),
+            "id": str(row.get("user_info.ID") or 10_000_000 + i) + (f"{i // len(self.rows)}" if i >= len(self.rows) else ""),
+            "category_name": row.get("user_info.Category", ""),
+            "biography": row.get("user_info.Biography", ""),
+            "is_private": False,
+            "is_verified": row.get("user_info.Is Verified", "").lower() == "true",
+            "profile_pic_url_hd": f"{self.image_base}/cdn/profile_{i}.jpg",
+            "edge_followed_by": {"count": _count(row.get("user_info.Followers") or 0)},
+            "edge_follow": {"count": _count(row.get("user_info.Following") or 0)},
+            "edge_owner_to_timeline_media": {"count": self.posts, "edges": edges},
+        }}}
+        self.profiles[username] = body
+        return body
+
+    def comments_for(self, post_id):
+        """Comments response body for post_id."""
+        rng = random.Random(f"{self.seed}:{post_id}")
+        count = self.post_comments.get(post_id, self.comments)
+        return {"comments": [
+            {"text": " ".join(rng.choice(COMMENT_WORDS) for _ in range(rng.randint(1, 8)))}
+            for _ in range(count)
+        ]}
+
+
+def synthetic_image(size=320):
+    """A JPEG of realistic size for the CDN stand-in."""
+    buffer = BytesIO()
+    Image.effect_noise((size, size), 48).convert("RGB").save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+# ===================== MOCK SERVER =====================
+class MockService:
+    """Local Instagram API, CDN and Groq stand-in with configurable latency and error rate."""
+
+    def __init__(self, profiles, fixtures, latency_ms, jitter_ms, error_rate, seed):
+        self.profiles = profiles
+        self.fixtures = fixtures
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.image = self._fixture_bytes("image.jpg") or synthetic_image()
+        self.groq = self._fixture_json("groq.json")
+        self.requests = 0
+        self.errors = 0
+
+    def _fixture_bytes(self, *parts):
+        if not self.fixtures:
+            return None
+        path = os.path.join(self.fixtures, *parts)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _fixture_json(self, *parts):
+        data = self._fixture_bytes(*parts)
+        return json.loads(data) if data is not None else None
+
+    def delay_and_fail(self):
+        """Sleep for the configured latency; return True if this request should fail."""
+        with self.rng_lock:
+            self.requests += 1
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            fail = self.rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def groq_response(self, request):
+        """Chat completion body; token counts are approximated from the prompt size."""
+        if self.groq is not None:
+            return self.groq
+        prompt_chars = sum(len(m.get("content", "")) for m in request.get("messages", []))
+        content = "Benchmark analysis. " * 40
+        return {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "benchmark"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_chars // 4 + len(content) // 4},
+        }
+
+    def handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without this, delayed ACKs add ~20 ms per request
+            disable_nagle_algorithm = True
+
+            def _send(self, status, body, content_type="application/json"):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if service.delay_and_fail():
+                    return self._send(500, {"message": "injected error"})
+
+                if url.path == "/api/v1/users/web_profile_info/":
+                    username = parse_qs(url.query).get("username", [""])[0]
+                    body = service._fixture_json("profiles", f"{username}.json") or service.profiles.profile(username)
+                    return self._send(200, body) if body else self._send(404, {"message": "not found"})
+
+                if url.path.startswith("/api/v1/media/") and url.path.endswith("/comments/"):
+                    post_id = url.path.split("/")[4]
+                    body = service._fixture_json("comments", f"{post_id}.json") or service.profiles.comments_for(post_id)
+                    return self._send(200, body)
+
+                if url.path.startswith("/cdn/"):
+                    return self._send(200, service.image, "image/jpeg")
+
+                self._send(404, {"message": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if service.delay_and_fail():
+                    return self._send(500, {"error": {"message": "injected error"}})
+                if urlparse(self.path).path == "/openai/v1/chat/completions":
+                    return self._send(200, service.groq_response(request))
+                self._send(404, {"error": {"message": "not found"}})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+# ===================== SCENARIOS =====================
+def summarize(name, latencies, elapsed, operations, peak_bytes):
+    """Throughput, latency percentiles and peak memory for one scenario."""
+    ordered = sorted(latencies)
+
+    def percentile(q):
+        return 1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+    return {
+        "scenario": name,
+        "operations": operations,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_ops_s": round(operations / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(0.50), 2) if ordered else None,
+        "p99_ms": round(percentile(0.99), 2) if ordered else None,
+        "mean_ms": round(1000 * statistics.fmean(ordered), 2) if ordered else None,
+        "peak_mem_mb": round(peak_bytes / 1e6, 2) if peak_bytes is not None else None,
+    }
+
+
+def run_scenario(name, func, items, track_memory):
+    """Call func on every item, timing each call."""
+    if track_memory:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    latencies = []
+    start = time.perf_counter()
+    for item in items:
+        call_start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - base if track_memory else None
+    return summarize(name, latencies, elapsed, len(items), peak)
+
+
+def run_batch_scenario(app, usernames, track_memory):
+    """Time batch_scrape_usernames, taking per-profile latency from consecutive scrape starts."""
+    starts = []
+    original = app.scrape_user
+
+    def timed_scrape(username, *args, **kwargs):
+        starts.append(time.perf_counter())
+        return original(username, *args, **kwargs)
+
+    if track_memory:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    app.scrape_user = timed_scrape
+    try:
+        start = time.perf_counter()
+        app.batch_scrape_usernames("\n".join(usernames), 0)
+        elapsed = time.perf_counter() - start
+    finally:
+        app.scrape_user = original
+    peak = tracemalloc.get_traced_memory()[1] - base if track_memory else None
+
+    boundaries = starts + [start + elapsed]
+    latencies = [b - a for a, b in zip(boundaries, boundaries[1:])]
+    return summarize("batch_scrape_usernames", latencies, elapsed, len(usernames), peak)
+
+
+def run_benchmarks(args):
+    profiles = SyntheticProfiles(args.csv, args.profiles, args.posts, args.comments, args.seed)
+    service = MockService(profiles, args.fixtures, args.latency_ms, args.jitter_ms, args.error_rate, args.seed)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), service.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    profiles.image_base = base_url
+
+    # The app reads these at import time
+    os.environ["INSTAGRAM_API_BASE"] = base_url
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ["GROQ_API_KEY"] = "benchmark"
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        mongo = MongoClient(args.mongo_uri)
+        mongo.drop_database(args.mongo_db)
+        app.bind_database(mongo[args.mongo_db])
+    else:
+        import mongomock
+        app.bind_database(mongomock.MongoClient()[args.mongo_db])
+
+    # Exported CSVs and caches land in a scratch directory
+    workdir = tempfile.mkdtemp(prefix="socialscan-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    # Train the bot-scoring model up front so save_to_mongo timings exclude it
+    app.train_bot_model(args.csv, os.path.join(workdir, app.BOT_MODEL_PATH))
+
+    selected = args.scenarios or SCENARIOS
+    usernames = profiles.usernames
+    scraped = {}
+    results = []
+    if args.memory:
+        tracemalloc.start()
+
+    try:
+        for name in SCENARIOS:
+            if name not in selected:
+                continue
+
+            if name == "scrape_user":
+                def scrape(username):
+                    scraped[username] = app.scrape_user(username)
+                results.append(run_scenario(name, scrape, usernames, args.memory))
+
+            elif name == "batch_scrape_usernames":
+                results.append(run_batch_scenario(app, usernames, args.memory))
+
+            else:
+                # Later scenarios need scraped, saved profiles; prepare them untimed
+                for username in usernames:
+                    if username not in scraped:
+                        scraped[username] = app.scrape_user(username)
+                if name != "save_to_mongo" and app.collection.estimated_document_count() == 0:
+                    for username in usernames:
+                        app.save_to_mongo(*scraped[username])
+
+                funcs = {
+                    "save_to_mongo": lambda username: app.save_to_mongo(*scraped[username]),
+                    "analyze_behavior": app.analyze_behavior,
+                    "export_user_data_to_csv": app.export_user_data_to_csv,
+                    "generate_prompt": lambda username: app.generate_prompt(username, "Content Strategy"),
+                }
+                results.append(run_scenario(name, funcs[name], usernames, args.memory))
+    finally:
+        if args.memory:
+            tracemalloc.stop()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        server.shutdown()
+        if args.mongo_uri:
+            mongo.drop_database(args.mongo_db)
+
+    return {
+        "config": {
+            "profiles": args.profiles,
+            "posts": args.posts,
+            "comments": args.comments,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "mongo": "mongod" if args.mongo_uri else "mongomock",
+            "fixtures": args.fixtures,
+        },
+        "mock_requests": service.requests,
+        "mock_errors": service.errors,
+        "results": results,
+    }
+
+
+# ===================== REPORTING =====================
+def print_report(report, baseline=None):
+    """Print results, with percentage change against a baseline run when given."""
+    previous = {r["scenario"]: r for r in (baseline or {}).get("results", [])}
+    columns = ["throughput_ops_s", "p50_ms", "p99_ms", "peak_mem_mb"]
+
+    header = f"{'scenario':<26}" + "".join(f"{c:>20}" for c in columns)
+    print(header)
+    print("-" * len(header))
+    for result in report["results"]:
+        line = f"{result['scenario']:<26}"
+        for column in columns:
+            value = result[column]
+            cell = "-" if value is None else f"{value:,.2f}"
+            old = previous.get(result["scenario"], {}).get(column)
+            if value is not None and old:
+                cell += f" ({100 * (value - old) / old:+.1f}%)"
+            line += f"{cell:>20}"
+        print(line)
+    print(f"\nMock requests: {report['mock_requests']:,} ({report['mock_errors']:,} injected errors)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark SocialScan against local stand-ins")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, help="Scenarios to run (default: all)")
+    parser.add_argument("--profiles", type=int, default=50, help="Number of synthetic profiles")
+    parser.add_argument("--posts", type=int, default=12, help="Posts per profile")
+    parser.add_argument("--comments", type=int, default=5, help="Average comments per post")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Base latency of every mock response")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="Extra uniform random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of mock responses that fail with 500")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--csv", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset1_train.csv"),
+                        help="dataset1_train.csv-style file that seeds the synthetic profiles")
+    parser.add_argument("--fixtures", help="Directory of recorded responses to replay")
+    parser.add_argument("--mongo-uri", help="Use this mongod instead of mongomock")
+    parser.add_argument("--mongo-db", default="socialscan_benchmark", help="Database name (dropped before and after)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="Skip tracemalloc peak-memory tracking, which slows Python code")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+PDF evidence report rendering for SocialScan.
+
+Kept apart from app.py so report worker processes can import it without
+starting the Streamlit app. app.py collects the report data (profile, posts,
+cached thumbnails, AI analysis, archive hashes) and calls render_report_pdf,
+usually through a process pool.
+
+Requires reportlab (pip install reportlab).
+"""
+
+import os
+import re
+import uuid
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Image as PdfImage
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+MEDIA_COLUMNS = 3
+CAPTION_CHARS = 160
+PROFILE_FIELDS = [
+    "Full Name", "ID", "Category", "Followers", "Following", "Image Count",
+    "Is Verified", "Is Private", "Homepage", "Email", "Phone",
+]
+
+
+def _pdf_text(value):
+    """Escape value for a Paragraph, dropping characters the built-in PDF fonts cannot draw (emoji)."""
+    text = str(value) if value is not None else ""
+    return escape(text.encode("latin-1", "ignore").decode("latin-1"))
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else "N/A"
+
+
+def _markdown_flowables(markdown, styles):
+    """Turn the headings, bullets and **bold**/*italic* emphasis used by format_analysis_response into paragraphs."""
+    flowables = []
+    for line in markdown.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        # Take the line's marker off before emphasis, whose markup a "* " bullet would otherwise split
+        if line.startswith("#"):
+            line, style, bullet = line.lstrip("# "), styles["Heading3"], None
+        elif line.startswith(("- ", "* ")):
+            line, style, bullet = line[2:], styles["Bullet"], "•"
+        else:
+            style, bullet = styles["BodyText"], None
+
+        text = _pdf_text(line)
+        text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
+        text = re.sub(r"\*(.+?)\*", r"<i>\1</i>", text)
+        try:
+            paragraph = Paragraph(text, style, bulletText=bullet)
+        except ValueError:
+            # Overlapping emphasis such as "**a *b** c*" nests the tags badly; keep the line as plain text
+            paragraph = Paragraph(_pdf_text(line), style, bulletText=bullet)
+        flowables.append(paragraph)
+    return flowables
+
+
+def _thumbnail(path, size):
+    """Thumbnail scaled into a size x size box, or None if it was not downloaded."""
+    if not path or not os.path.exists(path):
+        return None
+    image = PdfImage(path)
+    scale = min(size / image.imageWidth, size / image.imageHeight)
+    image.drawWidth = image.imageWidth * scale
+    image.drawHeight = image.imageHeight * scale
+    return image
+
+
+def _media_table(posts, styles, width):
+    """Grid of post thumbnails with likes, date and caption under each."""
+    cell_width = width / MEDIA_COLUMNS
+    cells = []
+    for post in posts:
+        caption = post.get("caption") or ""
+        if len(caption) > CAPTION_CHARS:
+            caption = caption[:CAPTION_CHARS] + "..."
+        likes = post.get("likes")
+        likes = f"{likes:,}" if isinstance(likes, (int, float)) else _pdf_text(likes)
+        cell = [
+            _thumbnail(post.get("thumbnail"), cell_width - 6 * mm) or Paragraph("[image not available]", styles["Small"]),
+            Paragraph(
+                f"<b>{likes} likes</b> &middot; {post.get('comment_count', 0)} comments"
+                f"<br/>{_format_time(post.get('timestamp'))} &middot; ID {_pdf_text(post.get('id'))}",
+                styles["Small"]
+            ),
+            Paragraph(_pdf_text(caption), styles["Small"]),
+        ]
+        cells.append(cell)
+
+    rows = [cells[i:i + MEDIA_COLUMNS] for i in range(0, len(cells), MEDIA_COLUMNS)]
+    rows[-1] += [""] * (MEDIA_COLUMNS - len(rows[-1]))
+    table = Table(rows, colWidths=[cell_width] * MEDIA_COLUMNS)
+    table.setStyle(TableStyle([
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+    ]))
+    return table
+
+
+def render_report_pdf(report, output_path):
+    """
+    Render one evidence report to output_path.
+
+    Args:
+        report (dict): as built by app.build_report_data; thumbnails are local file paths
+        output_path (str): where to write the PDF
+
+    Returns:
+        str: output_path
+    """
+    if not REPORTLAB_AVAILABLE:
+        raise RuntimeError("PDF reports require reportlab (pip install reportlab)")
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle("Small", parent=styles["BodyText"], fontSize=7.5, leading=9))
+    profile = report["profile"]
+
+    # Build beside the destination and move it into place, so an interrupted render never leaves a partial PDF
+    tmp_path = f"{output_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    doc = SimpleDocTemplate(
+        tmp_path, pagesize=A4,
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=15 * mm,
+        title=f"SocialScan evidence report: @{report['username']}",
+    )
+    story = [
+        Paragraph(f"Evidence Report: @{_pdf_text(report['username'])}", styles["Title"]),
+        Paragraph(f"Data captured {_format_time(report.get('captured_at'))}", styles["Italic"]),
+        Spacer(1, 4 * mm),
+    ]
+
+    # Profile header next to the profile picture
+    rows = [[Paragraph(f"<b>{field}</b>", styles["BodyText"]), Paragraph(_pdf_text(profile.get(field, "N/A")), styles["BodyText"])]
+            for field in PROFILE_FIELDS]
+    details = Table(rows, colWidths=[35 * mm, 95 * mm])
+    details.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP"), ("BOTTOMPADDING", (0, 0), (-1, -1), 1)]))
+    picture = _thumbnail(report.get("profile_thumbnail"), 40 * mm) or ""
+    header = Table([[picture, details]], colWidths=[45 * mm, 135 * mm])
+    header.setStyle(TableStyle([("VALIGN", (0, 0), (-1, -1), "TOP")]))
+    story += [header, Spacer(1, 3 * mm)]
+
+    story.append(Paragraph("Biography", styles["Heading3"]))
+    story.append(Paragraph(_pdf_text(profile.get("Biography", "")).replace("\n", "<br/>"), styles["BodyText"]))
+
+    if report.get("bot_score") is not None:
+        story.append(Paragraph("Bot Triage", styles["Heading3"]))
+        story.append(Paragraph(
+            f"Bot score {report['bot_score']:.2f}" + (f" ({_pdf_text(', '.join(report['bot_reasons']))})" if report.get("bot_reasons") else ""),
+            styles["BodyText"]
+        ))
+
+    if report.get("analysis"):
+        story.append(Paragraph("AI Analysis", styles["Heading2"]))
+        story += _markdown_flowables(report["analysis"], styles)
+
+    if report.get("posts"):
+        story.append(Paragraph(f"Media ({len(report['posts'])} posts)", styles["Heading2"]))
+        story.append(_media_table(report["posts"], styles, doc.width))
+
+    # Hashes of the archived API responses the report was built from
+    if report.get("captures"):
+        story.append(Paragraph("Source Captures", styles["Heading2"]))
+        rows = [["Captured", "Kind", "Post", "SHA-256"]] + [
+            [_format_time(c.get("captured_at")), c.get("kind", ""), c.get("post_id") or "", c.get("sha256", "")]
+            for c in report["captures"]
+        ]
+        captures = Table(rows, colWidths=[28 * mm, 25 * mm, 30 * mm, 97 * mm], repeatRows=1)
+        captures.setStyle(TableStyle([
+            ("FONTSIZE", (0, 0), (-1, -1), 6.5),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.grey),
+        ]))
+        story.append(captures)
+
+    try:
+        doc.build(story)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# app.py lives at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def mongo_db():
+    """Bind app to an in-memory mongomock database for the duration of a test."""
+    mongomock = pytest.importorskip("mongomock")
+    import app
+
+    original = app.db
+    database = mongomock.MongoClient()["socialscan_test"]
+    app.bind_database(database)
+    yield database
+    if original is not None:
+        app.bind_database(original)
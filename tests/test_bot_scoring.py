@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+import app
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAINING_CSV = os.path.join(REPO_DIR, "dataset1_train.csv")
+
+
+@pytest.fixture
+def bot_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "_bot_model", None)
+    return app.train_bot_model(TRAINING_CSV, str(tmp_path / "bot_model.json"))
+
+
+def scraped_profile(with_timestamps):
+    """A large, active creator account as scrape_user returns it."""
+    user_info = {
+        "Username": "natgeo_like",
+        "Full Name": "National Geographic",
+        "ID": "787132",
+        "Category": "Media",
+        "Biography": "Experience the world through the eyes of National Geographic photographers.",
+        "Followers": "283,000,000",
+        "Following": "150",
+        "Image Count": 12,
+        "Is Private": False,
+        "Is Verified": True,
+    }
+    images = [{
+        "ID": str(3_000_000 + i),
+        "Likes": 250_000 + 40_000 * (i % 5),
+        "Caption": f"Photo by a field photographer, story {i}. #wildlife",
+        "Timestamp": 1_750_000_000 - i * 86_400 if with_timestamps else None,
+        "Comments": ["Stunning", "Wow"],
+    } for i in range(12)]
+    return user_info, images
+
+
+def personal_profile():
+    """A small personal account that follows about as many accounts as follow it."""
+    user_info = {
+        "Username": "anna.k",
+        "Full Name": "Anna K",
+        "ID": "48213907",
+        "Biography": "Climbing, coffee and film photos",
+        "Followers": "540",
+        "Following": "610",
+        "Image Count": 12,
+        "Is Private": False,
+        "Is Verified": False,
+    }
+    images = [{
+        "ID": str(5_000_000 + i),
+        "Likes": 38 + 4 * (i % 3),
+        "Caption": f"Weekend trip {i}",
+        "Timestamp": 1_750_000_000 - i * 5 * 86_400,
+        "Comments": ["Nice!"],
+    } for i in range(12)]
+    return user_info, images
+
+
+def bot_profile():
+    """A follow-farming account: no bio or name, a generated username and no posts."""
+    user_info = {
+        "Username": "user84920317",
+        "Full Name": "",
+        "ID": "61077452",
+        "Biography": "",
+        "Followers": "12",
+        "Following": "7,500",
+        "Image Count": 0,
+        "Is Private": False,
+        "Is Verified": False,
+    }
+    return user_info, []
+
+
+def test_timestamps_do_not_change_score_of_scraped_profile(bot_model):
+    with_dates, reasons = app.score_profile(*scraped_profile(with_timestamps=True))
+    without_dates, _ = app.score_profile(*scraped_profile(with_timestamps=False))
+
+    assert with_dates < 0.5
+    assert with_dates == pytest.approx(without_dates)
+    assert "posts_per_week" not in reasons
+
+
+def test_ordinary_small_account_is_not_flagged(bot_model):
+    score, reasons = app.score_profile(*personal_profile())
+    assert score < 0.5, reasons
+
+
+def test_bot_like_account_is_flagged(bot_model):
+    score, reasons = app.score_profile(*bot_profile())
+    assert score > 0.5
+    assert "follower_following_ratio" in reasons
@@ -0,0 +1,16 @@
+import pytest
+
+import report
+
+pytest.importorskip("reportlab")
+
+
+def test_overlapping_emphasis_falls_back_to_plain_text(tmp_path):
+    analysis = "## Summary\n- **foo *bar** baz*\n**Tone:** friendly"
+    path = report.render_report_pdf(
+        {"username": "someone", "profile": {}, "analysis": analysis},
+        str(tmp_path / "someone.pdf")
+    )
+
+    with open(path, "rb") as f:
+        assert f.read(5) == b"%PDF-"
@@ -0,0 +1,60 @@
+import app
+
+
+def expire_lease(mongo_db, username):
+    mongo_db["scrape_queue"].update_one({"_id": username}, {"$set": {"lease_expires": 0}})
+
+
+def test_claim_leases_a_username_to_one_worker(mongo_db):
+    app.enqueue_usernames(["alice"])
+
+    entry = app.claim_next_username("w1")
+    assert entry["_id"] == "alice" and entry["lease_owner"] == "w1" and entry["attempts"] == 1
+    assert app.claim_next_username("w2") is None
+    assert app.renew_lease("alice", "w1")
+    assert not app.renew_lease("alice", "w2")
+
+
+def test_expired_lease_is_reclaimed(mongo_db):
+    app.enqueue_usernames(["alice"])
+    app.claim_next_username("w1")
+    expire_lease(mongo_db, "alice")
+
+    entry = app.claim_next_username("w2")
+    assert entry["lease_owner"] == "w2" and entry["attempts"] == 2
+    assert not app.renew_lease("alice", "w1")
+
+
+def test_lease_expiring_on_last_attempt_fails_the_entry(mongo_db):
+    app.enqueue_usernames(["alice"])
+    for attempt in range(app.MAX_SCRAPE_ATTEMPTS):
+        assert app.claim_next_username(f"w{attempt}") is not None
+        expire_lease(mongo_db, "alice")
+
+    assert app.claim_next_username("w9") is None
+    entry = mongo_db["scrape_queue"].find_one({"_id": "alice"})
+    assert entry["state"] == "failed" and "lease_owner" not in entry
+
+
+def test_failed_scrape_waits_out_its_backoff(mongo_db):
+    app.enqueue_usernames(["alice"])
+    app.finish_claim(app.claim_next_username("w1"), "w1", "Status code: 500")
+
+    entry = mongo_db["scrape_queue"].find_one({"_id": "alice"})
+    assert entry["state"] == "pending" and entry["not_before"] > entry["finished_at"]
+    assert app.claim_next_username("w1") is None
+
+    mongo_db["scrape_queue"].update_one({"_id": "alice"}, {"$set": {"not_before": 0}})
+    assert app.claim_next_username("w1")["attempts"] == 2
+
+
+def test_missing_profile_fails_without_retry(mongo_db, monkeypatch):
+    monkeypatch.setattr(app, "request_gate", None)
+    monkeypatch.setattr(app, "scrape_user", lambda username, http_client=None: (
+        {"Error": "Failed to retrieve data. Status code: 404", "Status Code": 404}, []
+    ))
+    app.enqueue_usernames(["ghost"])
+
+    assert app.run_worker("w1", session_ids=[None], exit_when_idle=True) == 0
+    entry = mongo_db["scrape_queue"].find_one({"_id": "ghost"})
+    assert entry["state"] == "failed" and entry["attempts"] == 1
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import app
+
+
+class FakeGroq:
+    """Stands in for the Groq client, counting completion calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=f"summary {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def scraped_posts(likes_offset=0):
+    return [{
+        "post_id": str(3_100_000 + i),
+        "likes": 1_000 + 37 * i + likes_offset,
+        "caption": f"Day {i} of the coastal trail, camping above the cliffs. " * 12,
+        "comments": [f"Great shot number {i}", "Where is this?"],
+    } for i in range(30)]
+
+
+def test_rescrape_with_changed_likes_reuses_every_chunk(mongo_db):
+    groq = FakeGroq()
+    chunks, hits = app._summarize_chunks(groq, app.CHUNK_SUMMARY_PROMPT, app.chunk_posts(scraped_posts()))
+    assert len(chunks) > 1 and hits == 0
+
+    rescraped = app.chunk_posts(scraped_posts(likes_offset=5_311))
+    calls = groq.calls
+    _, hits = app._summarize_chunks(groq, app.CHUNK_SUMMARY_PROMPT, rescraped)
+
+    assert hits == len(rescraped) == len(chunks)
+    assert groq.calls == calls